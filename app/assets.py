@@ -0,0 +1,159 @@
+import gzip
+import hashlib
+import json
+import os
+import stat
+import anyio
+from starlette.datastructures import Headers
+from starlette.staticfiles import StaticFiles
+
+# СТАТИЧЕСКИЕ ФАЙЛЫ (CSS, JS, изображения)
+# collectstatic копирует app/static в STATIC_ROOT под именами с хешем
+# содержимого (css/styles.3f2a9c1b7d4e.css) и рядом кладёт сжатые заранее
+# .gz и .br. manifest.json сопоставляет исходное имя с итоговым - по нему
+# шаблоны строят URL. Файл с хешем в имени не меняется никогда, поэтому
+# отдаётся с Cache-Control: immutable.
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_SOURCE_DIR = os.path.join(APP_DIR, "static")
+STATIC_ROOT = os.getenv("STATIC_ROOT", os.path.join(os.path.dirname(APP_DIR), "build", "static"))
+STATIC_URL = "/static/"
+STATIC_MANIFEST = "manifest.json"
+
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".svg", ".json", ".txt", ".html", ".xml", ".map", ".ico"}
+MIN_COMPRESS_SIZE = 256   # Меньше - заголовки сжатия съедят выигрыш
+HASH_LENGTH = 12
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+def _brotli():
+    """Модуль brotli, если установлен (опционально: pip install brotli)"""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+def fingerprint(relpath: str, content: bytes) -> str:
+    """css/styles.css -> css/styles.<hash>.css"""
+    root, ext = os.path.splitext(relpath)
+    return f"{root}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}{ext}"
+
+def _write_atomic(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def collect_static(source_dir: str = None, output_dir: str = None) -> dict:
+    """
+    Копирует статику с хешами в именах, сжимает gzip/brotli и пишет manifest.json.
+    Уже собранные файлы (то же содержимое - то же имя) пропускаются.
+    Возвращает счётчики copied/unchanged/compressed.
+    """
+    source_dir = source_dir or STATIC_SOURCE_DIR
+    output_dir = output_dir or STATIC_ROOT
+    brotli = _brotli()
+    manifest = {}
+    stats = {"copied": 0, "unchanged": 0, "compressed": 0}
+
+    for root, _, files in os.walk(source_dir):
+        for name in sorted(files):
+            source_path = os.path.join(root, name)
+            relpath = os.path.relpath(source_path, source_dir).replace(os.sep, "/")
+            with open(source_path, "rb") as f:
+                content = f.read()
+            hashed = fingerprint(relpath, content)
+            manifest[relpath] = hashed
+            target = os.path.join(output_dir, hashed)
+            if os.path.exists(target):
+                stats["unchanged"] += 1
+                continue
+            _write_atomic(target, content)
+            stats["copied"] += 1
+
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS or len(content) < MIN_COMPRESS_SIZE:
+                continue
+            # Сжатие один раз при сборке - можно взять максимальные уровни
+            gz = gzip.compress(content, compresslevel=9, mtime=0)
+            if len(gz) < len(content):
+                _write_atomic(target + ".gz", gz)
+                stats["compressed"] += 1
+            if brotli is not None:
+                br = brotli.compress(content, quality=11)
+                if len(br) < len(content):
+                    _write_atomic(target + ".br", br)
+                    stats["compressed"] += 1
+
+    _write_atomic(
+        os.path.join(output_dir, STATIC_MANIFEST),
+        json.dumps(manifest, indent=2, sort_keys=True).encode(),
+    )
+    _manifest_cache.clear()
+    return stats
+
+# Манифест перечитывается, только если файл изменился (новый collectstatic)
+_manifest_cache = {}
+
+def load_manifest(output_dir: str = None) -> dict:
+    path = os.path.join(output_dir or STATIC_ROOT, STATIC_MANIFEST)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return {}
+    cached = _manifest_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path) as f:
+            cached = (mtime, json.load(f))
+        _manifest_cache[path] = cached
+    return cached[1]
+
+def static_url(path: str) -> str:
+    """URL статического файла для шаблонов; до collectstatic - без хеша"""
+    return STATIC_URL + load_manifest().get(path, path)
+
+def manifest_digest() -> str:
+    """Хеш манифеста: страницы, ссылающиеся на статику, зависят от него"""
+    raw = json.dumps(load_manifest(), sort_keys=True).encode()
+    return hashlib.sha256(raw).hexdigest()
+
+def accepted_encodings(header: str) -> set:
+    """Кодировки из Accept-Encoding, кроме явно запрещённых (q=0)"""
+    accepted = set()
+    for item in header.split(","):
+        encoding, _, params = item.strip().partition(";")
+        params = params.replace(" ", "")
+        if encoding and params not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(encoding.lower())
+    return accepted
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles, отдающий заранее сжатый вариант (.br, затем .gz),
+    если клиент его принимает. Файлы из манифеста кешируются навсегда.
+    """
+
+    async def get_response(self, path: str, scope):
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        response = None
+        if scope["method"] in ("GET", "HEAD"):
+            for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+                if encoding not in accepted:
+                    continue
+                try:
+                    full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+                except (OSError, ValueError):
+                    break
+                if stat_result and stat.S_ISREG(stat_result.st_mode):
+                    response = self.file_response(full_path, stat_result, scope)
+                    response.headers["Content-Encoding"] = encoding
+                    break
+        if response is None:
+            response = await super().get_response(path, scope)
+        response.headers["Vary"] = "Accept-Encoding"
+        # Имена с хешем из манифеста не меняют содержимое никогда
+        if path in load_manifest(self.directory).values():
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
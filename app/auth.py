@@ -1,35 +1,162 @@
 import os
 import hashlib
-from passlib.context import CryptContext
+import logging
+import math
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-#from jose import jwt, JWTError, ExpiredSignatureError
-import jwt
-from jwt.exceptions import ExpiredSignatureError, InvalidTokenError, PyJWTError
+from functools import lru_cache
 from typing import Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # КОНФИГУРАЦИЯ ARGON2
-pwd_context = CryptContext(
-    schemes=["argon2"],  # Только Argon2
-    argon2__time_cost=2,        # Время вычисления (больше = безопаснее, но медленнее)
-    argon2__memory_cost=65536,  # Память в KiB (64MB)
-    argon2__parallelism=4,      # Параллельные потоки
-    deprecated="auto"
-)
+# passlib, бэкенд argon2 и PyJWT загружаются при первом использовании, а не при
+# импорте модуля: команды manage.py и воркеры, не работающие с паролями, их не ждут.
+# Параметры подбираются под машину командой manage.py calibrate-hash и
+# сохраняются в .env. Хеши со старыми параметрами пересчитываются при входе.
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "2"))          # Время вычисления (больше = безопаснее, но медленнее)
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # Память в KiB (64MB)
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))      # Параллельные потоки
+
+def make_pwd_context(time_cost: int, memory_cost: int, parallelism: int):
+    """CryptContext с заданными параметрами Argon2"""
+    from passlib.context import CryptContext
+    return CryptContext(
+        schemes=["argon2"],  # Только Argon2
+        argon2__time_cost=time_cost,
+        argon2__memory_cost=memory_cost,
+        argon2__parallelism=parallelism,
+        deprecated="auto"
+    )
+
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    return make_pwd_context(ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM)
+
+def _jwt():
+    #from jose import jwt, JWTError, ExpiredSignatureError
+    import jwt
+    return jwt
+
+def __getattr__(name: str):
+    # Совместимость: from app.auth import pwd_context
+    if name == "pwd_context":
+        return get_pwd_context()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 SECRET_KEY = os.getenv("SECRET_KEY", "ARQ!-secret-key-change-in-production")
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Access-токен живёт недолго; сессию продлевает refresh-токен (/auth/refresh)
+# без повторной проверки пароля Argon2
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Проверяет пароль"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Создаёт хеш пароля с Argon2"""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Хеш создан с другими параметрами Argon2 и должен быть пересчитан"""
+    return get_pwd_context().needs_update(hashed_password)
+
+# ПУЛ ДЛЯ ХЕШИРОВАНИЯ
+# Argon2 занимает ~64MB и десятки мс CPU на вызов. В async обработчиках хеширование
+# уходит в отдельный пул потоков (argon2-cffi отпускает GIL), а размер пула
+# ограничивает пиковую память. Сверх HASH_WORKERS + HASH_QUEUE_LIMIT задач
+# новые запросы сразу отклоняются, не занимая ни память, ни очередь.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "2"))
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", "8"))
+
+class HashPoolSaturated(RuntimeError):
+    """Пул хеширования перегружен - запрос нужно отклонить (503)"""
+
+class BoundedHashPool:
+    """Пул потоков фиксированного размера с ограниченной очередью"""
+
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(workers + queue_limit)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="argon2")
+
+    @property
+    def in_flight(self) -> int:
+        """Число задач в работе и в очереди"""
+        return self._in_flight
+
+    async def run(self, func, *args):
+        """Выполняет func(*args) в пуле; HashPoolSaturated если мест нет"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashPoolSaturated("Password hashing pool is saturated")
+        import asyncio
+        with self._lock:
+            self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+_hash_pool: Optional[BoundedHashPool] = None
+_hash_pool_lock = threading.Lock()
+
+def get_hash_pool() -> BoundedHashPool:
+    """Пул хеширования, создаётся при первом использовании"""
+    global _hash_pool
+    if _hash_pool is None:
+        with _hash_pool_lock:
+            if _hash_pool is None:
+                _hash_pool = BoundedHashPool(HASH_WORKERS, HASH_QUEUE_LIMIT)
+    return _hash_pool
+
+def shutdown_hash_pool():
+    """Останавливает пул хеширования; следующий вызов get_hash_pool создаст новый"""
+    global _hash_pool
+    with _hash_pool_lock:
+        pool, _hash_pool = _hash_pool, None
+    if pool is not None:
+        pool.shutdown()
+
+def _forget_hash_pool():
+    # Потоки пула не переживают fork: воркер создаст свой пул при первом входе
+    global _hash_pool
+    _hash_pool = None
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_hash_pool)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Проверяет пароль в пуле хеширования, не блокируя event loop"""
+    from app.tracing import span
+    with span("auth.password"):
+        return await get_hash_pool().run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Создаёт хеш пароля в пуле хеширования, не блокируя event loop"""
+    from app.tracing import span
+    with span("auth.password"):
+        return await get_hash_pool().run(get_password_hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Создаёт JWT токен"""
@@ -41,15 +168,105 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         #expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         expire = datetime.now() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    # iat нужен для отзыва всех токенов пользователя (revoke_user_tokens).
+    # Дробные секунды: токен, выданный в ту же секунду сразу после отзыва
+    # (вход с новым паролем), не должен считаться отозванным
+    to_encode.update({"exp": expire, "iat": time.time()})
+    encoded_jwt = _jwt().encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str):
+# КЕШ ПРОВЕРЕННЫХ ТОКЕНОВ
+# Повторная проверка уже известного токена не пересчитывает HMAC и не разбирает
+# claims: payload берётся из LRU-кеша по SHA-256 токена. Запись живёт не дольше
+# exp токена и TOKEN_CACHE_TTL секунд. Кеш и список отзыва хранятся в памяти
+# процесса, и в нём отзыв действует сразу. Отзыв всех токенов пользователя
+# (смена пароля, удаление) записывается ещё и в admin_users.tokens_valid_after:
+# при промахе кеша токен сверяется с БД, поэтому остальные процессы перестают
+# принимать старые токены не позже чем через TOKEN_CACHE_TTL секунд.
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "1024"))
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", "300"))
+
+class TokenCache:
+    """LRU-кеш payload проверенных JWT с отзывом токенов и пользователей"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()   # digest -> (payload, expires_at)
+        self._revoked = {}              # digest -> exp токена (после exp запись не нужна)
+        self._revoked_users = {}        # sub -> время отзыва, токены с iat раньше недействительны
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, digest: bytes) -> Optional[dict]:
+        """Payload из кеша или None (промах или истёкшая запись)"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[digest]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return dict(entry[0])
+
+    def put(self, digest: bytes, payload: dict):
+        if self.maxsize <= 0:
+            return
+        expires_at = min(float(payload["exp"]), time.time() + self.ttl)
+        with self._lock:
+            self._entries[digest] = (dict(payload), expires_at)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def is_revoked(self, digest: bytes, payload: dict) -> bool:
+        if digest in self._revoked:
+            return True
+        revoked_at = self._revoked_users.get(payload.get("sub"))
+        return revoked_at is not None and payload.get("iat", 0) <= revoked_at
+
+    def revoke(self, digest: bytes, exp: float):
+        """Отзывает один токен"""
+        now = time.time()
+        with self._lock:
+            self._entries.pop(digest, None)
+            self._revoked[digest] = exp
+            # Просроченные токены отклонит jwt.decode - их можно забыть
+            for key in [k for k, e in self._revoked.items() if e <= now]:
+                del self._revoked[key]
+
+    def revoke_user(self, sub: str) -> float:
+        """Отзывает все выданные пользователю токены; возвращает время отзыва"""
+        revoked_at = time.time()
+        with self._lock:
+            self._revoked_users[sub] = revoked_at
+            for key in [k for k, (p, _) in self._entries.items() if p.get("sub") == sub]:
+                del self._entries[key]
+        return revoked_at
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL)
+
+def _decode_token(token: str):
     """
-    Проверяет JWT токен.
+    Проверяет подпись и срок JWT токена без кеша.
     Возвращает payload если токен валиден, None если просрочен или невалиден.
     """
+    jwt = _jwt()
     try:
         payload = jwt.decode(
             token,
@@ -58,18 +275,80 @@ def verify_token(token: str):
             options={"require_exp": True}  # Требуем наличие поля exp
         )
         return payload
-    except ExpiredSignatureError:
+    except jwt.ExpiredSignatureError:
         # Токен просрочен
-        print("Token expired!")
+        logger.info("Token expired")
         return None
-    except InvalidTokenError:
-        print(f"InvalidTokenError")
+    except jwt.InvalidTokenError as e:
+        # Неправильная подпись, формат, нет exp и т.д.
+        logger.warning("Invalid token: %s", e)
         return None
-    except PyJWTError as e:
-        # Любая другая ошибка JWT (неправильная подпись, формат и т.д.)
-        print(f"PyJWTError: {e}")
+    except jwt.PyJWTError as e:
+        # Любая другая ошибка JWT
+        logger.warning("Token error: %s", e)
         return None
 
+def _tokens_valid_after(username: str) -> float:
+    """
+    Граница отзыва токенов администратора из БД (общая для всех процессов).
+    Для удалённого администратора - бесконечность: его токены не действуют.
+    """
+    from sqlalchemy import select
+    from app.database import read_engine
+    from app.models import AdminUser
+    with read_engine.connect() as conn:
+        row = conn.execute(
+            select(AdminUser.tokens_valid_after).where(AdminUser.username == username)
+        ).first()
+    if row is None:
+        return math.inf
+    return row.tokens_valid_after or 0.0
+
+def verify_token(token: str):
+    """
+    Проверяет JWT токен.
+    Возвращает payload если токен валиден, None если просрочен, невалиден или отозван.
+    Промах кеша - одно чтение из БД (вызывается из threadpool, event loop не блокирует).
+    """
+    digest = token_cache.digest(token)
+    payload = token_cache.get(digest)
+    if payload is None:
+        payload = _decode_token(token)
+        if payload is None:
+            return None
+        if payload.get("iat", 0) <= _tokens_valid_after(payload.get("sub")):
+            return None
+        token_cache.put(digest, payload)
+    if token_cache.is_revoked(digest, payload):
+        return None
+    return payload
+
+def revoke_token(token: str):
+    """Отзывает токен (logout). Невалидные токены игнорируются."""
+    payload = _decode_token(token)
+    if payload is not None:
+        token_cache.revoke(token_cache.digest(token), float(payload["exp"]))
+
+def revoke_user_tokens(username: str) -> float:
+    """
+    Отзывает все токены пользователя в этом процессе (смена пароля, удаление).
+    Возвращает время отзыва - его нужно сохранить в AdminUser.tokens_valid_after,
+    чтобы отзыв увидели остальные процессы.
+    """
+    return token_cache.revoke_user(username)
+
+def create_refresh_token() -> str:
+    """Случайный непрозрачный refresh-токен"""
+    return secrets.token_urlsafe(32)
+
+def hash_refresh_token(token: str) -> str:
+    """
+    Хеш refresh-токена для хранения в БД.
+    Токен - 256 случайных бит, перебор невозможен, поэтому достаточно
+    быстрого SHA-256 без соли (Argon2 здесь только тратил бы CPU и память).
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
+
 # Временное решение для тестов
 def hash_password_stub(password: str) -> str:
     return hashlib.sha256(password.encode()).hexdigest()
@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.crud import bump_table_version
+from app.models import Vacancy
+
+# КЕШ ПУБЛИЧНЫХ ОТВЕТОВ ПО ВАКАНСИЯМ
+# Хранит готовые JSON-байты: попадание в кеш не трогает ни БД, ни ORM,
+# ни сериализацию. Ключ ответа содержит версию таблицы (table_versions),
+# а сама версия кешируется лишь на VACANCY_VERSION_TTL секунд: запись из
+# другого процесса (импорт, скрипты, другие воркеры serve) видна не позже
+# чем через VACANCY_VERSION_TTL, и старое тело под новой версией не отдаётся.
+# События записи Vacancy в этом процессе сбрасывают кеш сразу.
+VACANCY_CACHE_SIZE = int(os.getenv("VACANCY_CACHE_SIZE", "512"))
+VACANCY_CACHE_TTL = float(os.getenv("VACANCY_CACHE_TTL", "60"))
+VACANCY_VERSION_TTL = float(os.getenv("VACANCY_VERSION_TTL", "1"))
+
+class ResponseCache:
+    """LRU-кеш сериализованных ответов с TTL и поколениями"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0  # Растёт при каждом сбросе
+        self._entries = OrderedDict()  # key -> (body, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, body: bytes, generation: int, ttl: Optional[float] = None):
+        """
+        Сохраняет ответ, если с момента чтения из БД (generation)
+        кеш не сбрасывался - иначе данные могли устареть.
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (body, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]):
+        """Удаляет записи, для ключей которых predicate истинен"""
+        with self._lock:
+            self.generation += 1
+            for key in [k for k in self._entries if predicate(k)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+vacancy_cache = ResponseCache(VACANCY_CACHE_SIZE, VACANCY_CACHE_TTL)
+
+# Версия таблицы вакансий (version, updated_at) - сбрасывается вместе со списками
+VERSION_KEY = ("version",)
+
+def list_key(version: int, cursor: Optional[str], limit: int) -> tuple:
+    return ("list", version, cursor, limit)
+
+def detail_key(version: int, vacancy_id: int) -> tuple:
+    return ("vacancy", version, vacancy_id)
+
+def invalidate_vacancy(vacancy_id: Optional[int]):
+    """Сбрасывает все списки, версию таблицы и карточку изменённой вакансии"""
+    vacancy_cache.invalidate(
+        lambda key: key[0] == "list" or key == VERSION_KEY or (key[0] == "vacancy" and key[2] == vacancy_id)
+    )
+
+# Сброс по событиям записи. Mapper-события срабатывают при flush, но до commit
+# другие соединения ещё видят старые данные и могут снова наполнить кеш -
+# поэтому изменённые id запоминаются и сбрасываются повторно после commit.
+@event.listens_for(Vacancy, "after_insert")
+@event.listens_for(Vacancy, "after_update")
+@event.listens_for(Vacancy, "after_delete")
+def _on_vacancy_write(mapper, connection, target):
+    invalidate_vacancy(target.id)
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_vacancies", set()).add(target.id)
+        session.info["bump_vacancy_version"] = True
+
+# Версия поднимается один раз на flush, а не на каждую строку
+@event.listens_for(Session, "after_flush")
+def _on_flush(session, flush_context):
+    if session.info.pop("bump_vacancy_version", False):
+        bump_table_version(session.connection(), Vacancy.__tablename__)
+
+# Массовые update/delete через ORM (query.delete(), update(Vacancy)) идут
+# мимо mapper-событий - версию и кеш сбрасываем здесь
+@event.listens_for(Session, "do_orm_execute")
+def _on_orm_execute(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is Vacancy:
+        session = orm_execute_state.session
+        vacancy_cache.clear()
+        session.info["vacancies_bulk_changed"] = True
+        bump_table_version(session.connection(), Vacancy.__tablename__)
+
+@event.listens_for(Session, "after_commit")
+def _on_commit(session):
+    if session.info.pop("vacancies_bulk_changed", False):
+        vacancy_cache.clear()
+    for vacancy_id in session.info.pop("changed_vacancies", ()):
+        invalidate_vacancy(vacancy_id)
+
+@event.listens_for(Session, "after_rollback")
+def _on_rollback(session):
+    session.info.pop("changed_vacancies", None)
+    session.info.pop("vacancies_bulk_changed", None)
+    session.info.pop("bump_vacancy_version", None)
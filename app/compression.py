@@ -0,0 +1,187 @@
+import os
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+from app.assets import accepted_encodings
+from app.metrics import Counter
+
+# СЖАТИЕ ОТВЕТОВ
+# Потоковое: каждый кусок тела сжимается и сразу уходит клиенту, ответ
+# целиком в памяти не собирается. Сжимаются только текстовые типы крупнее
+# COMPRESS_MIN_SIZE; уже сжатые ответы (Content-Encoding, например
+# статика .br/.gz) проходят как есть. brotli и zstd - если установлены
+# пакеты brotli / zstandard, иначе только gzip.
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+COMPRESS_ZSTD_LEVEL = int(os.getenv("COMPRESS_ZSTD_LEVEL", "3"))
+
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+}
+
+COMPRESSED_BYTES = Counter(
+    "http_compression_bytes_total", "Response body bytes before and after compression",
+    labelnames=("encoding", "stage"),
+)
+
+def _is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith("text/") or media_type in COMPRESSIBLE_TYPES
+
+class GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 - формат gzip
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        out = self._compressor.compress(data)
+        return out + self._compressor.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH)
+
+class BrotliCompressor:
+    def __init__(self, quality: int):
+        import brotli
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        out = self._compressor.process(data)
+        return out + self._compressor.flush() if flush else out
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+class ZstdCompressor:
+    def __init__(self, level: int):
+        import zstandard
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        out = self._compressor.compress(data)
+        return out + self._compressor.flush(self._flush_block) if flush else out
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+def available_encodings() -> dict:
+    """Доступные кодировки в порядке предпочтения: имя -> класс компрессора"""
+    encodings = {}
+    try:
+        import brotli  # noqa: F401
+        encodings["br"] = BrotliCompressor
+    except ImportError:
+        pass
+    try:
+        import zstandard  # noqa: F401
+        encodings["zstd"] = ZstdCompressor
+    except ImportError:
+        pass
+    encodings["gzip"] = GzipCompressor
+    return encodings
+
+class CompressionMiddleware:
+    """
+    ASGI middleware сжатия ответов.
+    levels - уровни по кодировкам ({"gzip": 6, "br": 4, "zstd": 3}),
+    route_levels - переопределение для шаблонов маршрутов
+    ({"/vacancies": {"gzip": 9}}).
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_SIZE, levels: dict = None, route_levels: dict = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": COMPRESS_GZIP_LEVEL, "br": COMPRESS_BROTLI_QUALITY, "zstd": COMPRESS_ZSTD_LEVEL}
+        self.levels.update(levels or {})
+        self.route_levels = route_levels or {}
+        self.encodings = available_encodings()
+
+    def _choose_encoding(self, scope):
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        for encoding in self.encodings:
+            if encoding in accepted:
+                return encoding
+        return None
+
+    def _should_compress(self, start: dict, headers: Headers, body: bytes, more_body: bool) -> bool:
+        if start["status"] < 200 or start["status"] in (204, 206, 304):
+            return False
+        if "content-encoding" in headers or "no-transform" in headers.get("cache-control", ""):
+            return False
+        if not _is_compressible(headers.get("content-type", "")):
+            return False
+        if "content-length" in headers:
+            return int(headers["content-length"]) >= self.minimum_size
+        # Потоковый ответ без длины: маленький - только если он уже целиком здесь
+        return more_body or len(body) >= self.minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self._choose_encoding(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor = None
+
+        async def send_compressed(message):
+            nonlocal start, compressor
+            message_type = message["type"]
+            if message_type == "http.response.start":
+                start = message  # Заголовки уходят вместе с первым куском тела
+                return
+            if message_type != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(scope=start)
+                if not self._should_compress(start, headers, body, more_body):
+                    await send(start)
+                    start = None
+                    await send(message)
+                    return
+                route = scope.get("route")
+                levels = self.route_levels.get(getattr(route, "path", None), {})
+                compressor = self.encodings[encoding](levels.get(encoding, self.levels[encoding]))
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                # Сжатое тело - другое представление: строгий ETag становится слабым
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = "W/" + etag
+                if "content-length" in headers:
+                    del headers["Content-Length"]
+                if not more_body:
+                    data = compressor.finish(body)
+                    headers["Content-Length"] = str(len(data))
+                    self._count(encoding, body, data)
+                    await send(start)
+                    start = None
+                    await send({"type": "http.response.body", "body": data})
+                    return
+                await send(start)
+                start = None
+
+            if compressor is None:
+                await send(message)
+                return
+            # Каждый кусок дожимается flush: клиент получает данные без задержки
+            data = compressor.compress(body, flush=True) if more_body else compressor.finish(body)
+            self._count(encoding, body, data)
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _count(encoding: str, raw: bytes, compressed: bytes):
+        COMPRESSED_BYTES.inc(encoding, "in", amount=len(raw))
+        COMPRESSED_BYTES.inc(encoding, "out", amount=len(compressed))
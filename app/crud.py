@@ -0,0 +1,396 @@
+import base64
+import json
+import os
+import re
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import String, bindparam, insert, literal, or_, select, tuple_, type_coerce, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.auth import REFRESH_TOKEN_EXPIRE_DAYS, create_refresh_token, hash_refresh_token
+from app import queries
+from app.models import AdminUser, RefreshToken, TableVersion, Vacancy, VacancyTombstone, VACANCY_FTS_DDL, make_excerpt
+
+class InvalidCursor(ValueError):
+    """Курсор пагинации не удалось разобрать"""
+
+def _pack_cursor(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _unpack_cursor(cursor: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(cursor) from e
+    if not isinstance(values, list):
+        raise InvalidCursor(cursor)
+    return values
+
+def encode_cursor(created_key: str, vacancy_id: int) -> str:
+    """Упаковывает позицию (created_at, id) в непрозрачный курсор"""
+    return _pack_cursor([created_key, vacancy_id])
+
+def decode_cursor(cursor: str) -> tuple[str, int]:
+    """Распаковывает курсор; InvalidCursor если он повреждён"""
+    values = _unpack_cursor(cursor)
+    if len(values) != 2 or not isinstance(values[0], str) or not isinstance(values[1], int):
+        raise InvalidCursor(cursor)
+    return values[0], values[1]
+
+async def list_vacancies(
+    db: AsyncSession,
+    is_active: bool = True,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+):
+    """
+    Страница вакансий, от новых к старым, без полного текста (см. app.queries).
+    Пагинация по ключу (created_at, id) вместо OFFSET: стоимость страницы
+    не зависит от её номера и размера таблицы.
+    Возвращает (список строк, курсор следующей страницы или None).
+    """
+    # Лишняя строка говорит, есть ли следующая страница
+    params = {"is_active": is_active, "limit": limit + 1}
+    if cursor:
+        params["created_key"], params["after_id"] = decode_cursor(cursor)
+        rows = (await db.execute(queries.VACANCY_PAGE_AFTER, params)).all()
+    else:
+        rows = (await db.execute(queries.VACANCY_PAGE, params)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_key, rows[-1].id)
+    return rows, next_cursor
+
+# ЛЕНТА ИЗМЕНЕНИЙ
+# Позиция в ленте - (время изменения, id, признак удаления). Отдаются только
+# изменения из секунд, закончившихся больше CHANGE_FEED_LAG секунд назад:
+# время ставится до commit (с точностью до секунды), и транзакция, начатая
+# раньше, может закоммитить более раннюю метку уже после того, как клиент
+# прочитал страницу. Строки без updated_at (созданные
+# до появления ленты) идут первыми, как начальный снимок.
+CHANGE_FEED_LAG = float(os.getenv("CHANGE_FEED_LAG", "2"))
+
+_updated_key = type_coerce(Vacancy.updated_at, String)
+_deleted_key = type_coerce(VacancyTombstone.deleted_at, String)
+
+def encode_change_cursor(changed_key: Optional[str], vacancy_id: int, deleted: int) -> str:
+    return _pack_cursor([changed_key, vacancy_id, deleted])
+
+def decode_change_cursor(cursor: str) -> tuple[Optional[str], int, int]:
+    """Распаковывает курсор ленты; InvalidCursor если он повреждён"""
+    values = _unpack_cursor(cursor)
+    if (len(values) != 3 or not isinstance(values[0], (str, type(None)))
+            or not isinstance(values[1], int) or values[2] not in (0, 1)):
+        raise InvalidCursor(cursor)
+    return values[0], values[1], values[2]
+
+def _changes_after(changed_key, id_column, deleted: int, since, cutoff: str, limit: int):
+    """
+    Ветка ленты (вакансии или удаления) после позиции since, не новее cutoff.
+    Сортировка и LIMIT внутри ветки - каждая читает по индексу не больше limit строк.
+    """
+    query = select(
+        changed_key.label("changed_key"), id_column.label("id"), literal(deleted).label("deleted"),
+    )
+    if since is None or since[0] is None:
+        query = query.where(or_(changed_key.is_(None), changed_key < cutoff))
+    else:
+        query = query.where(changed_key < cutoff)
+    if since is not None:
+        since_key, since_id, since_deleted = since
+        # (key, id, deleted) > since, а deleted в ветке постоянный:
+        # при deleted > since_deleted подходит и та же позиция (key, id)
+        inclusive = deleted > since_deleted
+        if since_key is None:
+            after_id = id_column >= since_id if inclusive else id_column > since_id
+            query = query.where(or_(changed_key.is_not(None), after_id))
+        else:
+            position, start = tuple_(changed_key, id_column), tuple_(since_key, since_id)
+            query = query.where(position >= start if inclusive else position > start)
+    return query.order_by(changed_key, id_column).limit(limit).subquery()
+
+async def list_vacancy_changes(db: AsyncSession, since: Optional[str] = None, limit: int = 100):
+    """
+    Изменения вакансий после курсора since в порядке их времени.
+    Возвращает ([(op, id, changed_at, vacancy или None)], next_cursor, has_more);
+    op - upsert, deactivate или delete. Стоимость зависит от числа
+    изменений после курсора, а не от размера таблицы.
+    """
+    position = decode_change_cursor(since) if since else None
+    cutoff = (_utcnow() - timedelta(seconds=CHANGE_FEED_LAG)).strftime("%Y-%m-%d %H:%M:%S")
+    branches = [
+        _changes_after(_updated_key, Vacancy.id, 0, position, cutoff, limit + 1),
+        _changes_after(_deleted_key, VacancyTombstone.vacancy_id, 1, position, cutoff, limit + 1),
+    ]
+    changes = union_all(*(select(branch) for branch in branches)).subquery()
+    rows = (await db.execute(
+        select(changes)
+        .order_by(changes.c.changed_key, changes.c.id, changes.c.deleted)
+        .limit(limit + 1)
+    )).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    ids = [row.id for row in rows if not row.deleted]
+    vacancies = {}
+    if ids:
+        vacancies = {v.id: v for v in (await db.execute(select(Vacancy).where(Vacancy.id.in_(ids)))).scalars()}
+    items = []
+    for row in rows:
+        vacancy = None if row.deleted else vacancies.get(row.id)
+        if vacancy is None:
+            op = "delete"
+        elif vacancy.is_active:
+            op = "upsert"
+        else:
+            op, vacancy = "deactivate", None
+        items.append((op, row.id, row.changed_key, vacancy))
+
+    next_cursor = since
+    if rows:
+        last = rows[-1]
+        next_cursor = encode_change_cursor(last.changed_key, last.id, last.deleted)
+    return items, next_cursor, has_more
+
+_MAX_SEARCH_TERMS = 10
+
+def build_match_query(q: str) -> str:
+    """
+    Превращает пользовательскую строку в безопасный запрос FTS5.
+    Каждое слово берётся в кавычки (операторы FTS5 не интерпретируются)
+    и ищется по префиксу; слова объединяются через AND.
+    """
+    terms = re.findall(r"\w+", q)[:_MAX_SEARCH_TERMS]
+    return " ".join(f'"{term}"*' for term in terms)
+
+async def search_vacancies(db: AsyncSession, q: str, limit: int = 20):
+    """
+    Полнотекстовый поиск по активным вакансиям, по убыванию релевантности.
+    Веса bm25: совпадение в заголовке важнее, чем в описании.
+    """
+    match = build_match_query(q)
+    if not match:
+        return []
+    return (await db.execute(queries.VACANCY_SEARCH, {"match": match, "limit": limit})).all()
+
+def rebuild_search_index(engine):
+    """
+    Создаёт (если нужно) и полностью перестраивает индекс FTS5.
+    Нужен для БД, созданных до появления поиска, и после массового импорта.
+    """
+    with engine.begin() as conn:
+        for statement in VACANCY_FTS_DDL:
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql("INSERT INTO vacancies_fts(vacancies_fts) VALUES ('rebuild')")
+        conn.exec_driver_sql("INSERT INTO vacancies_fts(vacancies_fts) VALUES ('optimize')")
+        return conn.exec_driver_sql("SELECT count(*) FROM vacancies").scalar()
+
+def _add_column_if_missing(conn, table_name: str, column: str, ddl_type: str) -> bool:
+    """ALTER TABLE ADD COLUMN для БД, созданных до появления колонки"""
+    from sqlalchemy import inspect as sa_inspect
+    if column in {c["name"] for c in sa_inspect(conn).get_columns(table_name)}:
+        return False
+    conn.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {column} {ddl_type}")
+    return True
+
+def add_token_revocation_column(engine) -> bool:
+    """Добавляет admin_users.tokens_valid_after в БД, созданные до её появления"""
+    with engine.begin() as conn:
+        return _add_column_if_missing(conn, AdminUser.__tablename__, "tokens_valid_after", "FLOAT")
+
+def add_refresh_token_replaced_column(engine) -> bool:
+    """Добавляет refresh_tokens.replaced_at в БД, созданные до её появления"""
+    with engine.begin() as conn:
+        return _add_column_if_missing(conn, RefreshToken.__tablename__, "replaced_at", "DATETIME")
+
+def backfill_excerpts(engine, batch_size: int = 1000) -> int:
+    """
+    Добавляет колонку excerpt в БД, созданные до её появления, и заполняет
+    её у строк без анонса. Возвращает число обновлённых вакансий.
+    """
+    table = Vacancy.__table__
+    with engine.begin() as conn:
+        _add_column_if_missing(conn, table.name, "excerpt", "VARCHAR(255)")
+    updated = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(table.c.id, table.c.description).where(table.c.excerpt.is_(None)).limit(batch_size)
+            ).all()
+            if not rows:
+                return updated
+            conn.execute(
+                update(table).where(table.c.id == bindparam("_id")).values(excerpt=bindparam("_excerpt")),
+                [{"_id": row.id, "_excerpt": make_excerpt(row.description)} for row in rows],
+            )
+            updated += len(rows)
+
+def backfill_updated_at(engine) -> int:
+    """
+    Для БД, созданных до ленты изменений: заполняет updated_at у строк без
+    него (строки с NULL видны только в начальном снимке ленты).
+    Возвращает число обновлённых вакансий.
+    """
+    from sqlalchemy import func
+    table = Vacancy.__table__
+    with engine.begin() as conn:
+        result = conn.execute(
+            update(table).where(table.c.updated_at.is_(None))
+            .values(updated_at=func.coalesce(table.c.created_at, func.now()))
+        )
+        return result.rowcount
+
+def create_vacancy_indexes(engine) -> list:
+    """
+    Индексы Vacancy, которых нет в БД (create_all не трогает уже созданные
+    таблицы). Возвращает имена созданных индексов.
+    """
+    from sqlalchemy import inspect as sa_inspect
+    table = Vacancy.__table__
+    with engine.begin() as conn:
+        existing = {index["name"] for index in sa_inspect(conn).get_indexes(table.name)}
+        created = []
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name not in existing:
+                index.create(conn)
+                created.append(index.name)
+        return created
+
+async def get_vacancy(db: AsyncSession, vacancy_id: int) -> Optional[Vacancy]:
+    """Активная вакансия по id или None"""
+    query = select(Vacancy).where(Vacancy.id == vacancy_id, Vacancy.is_active.is_(True))
+    return (await db.execute(query)).scalar_one_or_none()
+
+def _utcnow() -> datetime:
+    """Текущее время UTC без tzinfo - в таком виде SQLite хранит DateTime"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+# ВЕРСИЯ ТАБЛИЦЫ
+def bump_table_version(connection, name: str):
+    """
+    Увеличивает версию таблицы в текущей транзакции (sync Connection).
+    Вызывается при записи; строка создаётся при первом изменении.
+    """
+    now = _utcnow()
+    result = connection.execute(
+        update(TableVersion)
+        .where(TableVersion.name == name)
+        .values(version=TableVersion.version + 1, updated_at=now)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(TableVersion).values(name=name, version=1, updated_at=now))
+
+async def get_table_version(db: AsyncSession, name: str) -> tuple[int, Optional[datetime]]:
+    """(version, updated_at) таблицы; (0, None) если она ещё не менялась"""
+    row = (await db.execute(
+        select(TableVersion.version, TableVersion.updated_at).where(TableVersion.name == name)
+    )).first()
+    return (row.version, row.updated_at) if row else (0, None)
+
+class RefreshTokenError(ValueError):
+    """Refresh-токен неизвестен, истёк или отозван"""
+
+class RefreshTokenReused(RefreshTokenError):
+    """Повторное использование заменённого токена - цепочка отозвана"""
+
+    def __init__(self, username: str):
+        super().__init__(f"Refresh token reused for {username}")
+        self.username = username
+
+def issue_refresh_token(db: AsyncSession, username: str, family_id: Optional[str] = None) -> str:
+    """Добавляет в сессию новый refresh-токен; commit выполняет вызывающий"""
+    token = create_refresh_token()
+    db.add(RefreshToken(
+        token_hash=hash_refresh_token(token),
+        family_id=family_id or secrets.token_hex(16),
+        username=username,
+        expires_at=_utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return token
+
+async def _revoke_family(db: AsyncSession, family_id: str):
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=_utcnow())
+    )
+    await db.commit()
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> tuple[str, str]:
+    """
+    Меняет refresh-токен на новый из той же цепочки.
+    Один поиск по уникальному индексу token_hash, условный UPDATE
+    (защита от гонки двух одновременных обновлений) и INSERT.
+    Возвращает (username, новый refresh-токен).
+    """
+    query = select(RefreshToken).where(RefreshToken.token_hash == hash_refresh_token(token))
+    row = (await db.execute(query)).scalar_one_or_none()
+    if row is None:
+        raise RefreshTokenError("Unknown refresh token")
+    if row.replaced_at is not None:
+        await _revoke_family(db, row.family_id)
+        raise RefreshTokenReused(row.username)
+    if row.revoked_at is not None:
+        raise RefreshTokenError("Refresh token revoked")  # Выход или смена пароля
+    if row.expires_at <= _utcnow():
+        raise RefreshTokenError("Refresh token expired")
+
+    now = _utcnow()
+    result = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == row.id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now, replaced_at=now)
+    )
+    if result.rowcount != 1:
+        # Токен изменили параллельно: кражей считается только чужая ротация, не выход
+        replaced_at = (await db.execute(
+            select(RefreshToken.replaced_at).where(RefreshToken.id == row.id)
+        )).scalar_one()
+        if replaced_at is None:
+            await db.rollback()
+            raise RefreshTokenError("Refresh token revoked")
+        await _revoke_family(db, row.family_id)
+        raise RefreshTokenReused(row.username)
+    new_token = issue_refresh_token(db, row.username, row.family_id)
+    await db.commit()
+    return row.username, new_token
+
+async def revoke_refresh_token(db: AsyncSession, token: str):
+    """Отзывает цепочку, к которой относится refresh-токен (logout)"""
+    query = select(RefreshToken.family_id).where(RefreshToken.token_hash == hash_refresh_token(token))
+    family_id = (await db.execute(query)).scalar_one_or_none()
+    if family_id is not None:
+        await _revoke_family(db, family_id)
+
+def revoke_user_refresh_tokens(db: Session, username: str):
+    """Отзывает все refresh-токены пользователя (смена пароля, удаление)"""
+    db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.username == username, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=_utcnow())
+    )
+    db.commit()
+
+async def set_tokens_valid_after(db: AsyncSession, username: str, valid_after: float):
+    """Сохраняет время отзыва access-токенов пользователя (см. revoke_user_tokens)"""
+    await db.execute(
+        update(AdminUser).where(AdminUser.username == username).values(tokens_valid_after=valid_after)
+    )
+    await db.commit()
+
+async def update_password_hash(db: AsyncSession, admin_id: int, old_hash: str, new_hash: str) -> bool:
+    """
+    Заменяет хеш пароля, только если он не менялся с момента проверки
+    (пароль могли сменить, пока считался новый хеш).
+    """
+    result = await db.execute(
+        update(AdminUser)
+        .where(AdminUser.id == admin_id, AdminUser.hashed_password == old_hash)
+        .values(hashed_password=new_hash)
+    )
+    await db.commit()
+    return result.rowcount == 1
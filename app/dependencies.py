@@ -0,0 +1,31 @@
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from app.auth import verify_token
+from app.ratelimit import check_login_rate
+from app.schemas import LoginRequest
+from app.tracing import span
+
+bearer_scheme = HTTPBearer()
+
+def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)) -> dict:
+    """Payload JWT токена администратора; 401 если токен невалиден или отозван"""
+    with span("auth.token"):
+        payload = verify_token(credentials.credentials)
+    if payload is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
+
+def login_rate_limit(request: Request, form: LoginRequest):
+    """429 до любой работы с паролем, если попыток входа с IP или на логин слишком много"""
+    client_ip = request.client.host if request.client else "unknown"
+    retry_after = check_login_rate(client_ip, form.username)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many login attempts",
+            headers={"Retry-After": str(retry_after)},
+        )
@@ -0,0 +1,183 @@
+import asyncio
+import os
+import time
+from typing import Optional
+from sqlalchemy import text
+from app.metrics import gauge_lines, register_collector
+
+# ПРОВЕРКИ ЗДОРОВЬЯ ДЛЯ БАЛАНСИРОВЩИКА
+# /health/live  - процесс жив и event loop отвечает (без обращения к БД)
+# /health/ready - можно слать трафик: прогрев закончен, SELECT 1 проходит
+#                 через каждый движок, пулы не исчерпаны, задержка event
+#                 loop в пределах нормы.
+# Результат проверки готовности кешируется на HEALTH_CACHE_SECONDS, а
+# одновременные запросы ждут одну общую проверку: частые health-check'и
+# нескольких балансировщиков не добавляют нагрузки на БД.
+HEALTH_CACHE_SECONDS = float(os.getenv("HEALTH_CACHE_SECONDS", "1"))
+HEALTH_DB_TIMEOUT = float(os.getenv("HEALTH_DB_TIMEOUT", "1"))
+HEALTH_MAX_LOOP_LAG = float(os.getenv("HEALTH_MAX_LOOP_LAG", "0.5"))
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.25"))
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+class LoopLagMonitor:
+    """
+    Задержка event loop: фоновая задача засыпает на interval и измеряет,
+    насколько позже она проснулась. Большая задержка - блокирующий код
+    в обработчиках или нехватка CPU.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, window: int = 40):
+        self.interval = interval
+        self.window = window
+        self.lag = 0.0
+        self._recent = []
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def max_lag(self) -> float:
+        """Наибольшая задержка за последние window измерений (~10 с)"""
+        return max(self._recent, default=0.0)
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, time.perf_counter() - started - self.interval)
+            self._recent.append(self.lag)
+            if len(self._recent) > self.window:
+                del self._recent[0]
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def as_dict(self) -> dict:
+        return {"lag_ms": _ms(self.lag), "max_lag_ms": _ms(self.max_lag), "running": self._task is not None}
+
+loop_lag = LoopLagMonitor()
+
+def pool_stats(engine) -> dict:
+    """Состояние пула соединений; saturated - все соединения заняты"""
+    pool = getattr(engine, "sync_engine", engine).pool
+    if not hasattr(pool, "checkedout"):
+        return {"type": type(pool).__name__}  # Пулы без счётчиков (SQLite :memory:)
+    size, checked_out, overflow = pool.size(), pool.checkedout(), pool.overflow()
+    max_overflow = getattr(pool, "_max_overflow", 0)
+    return {
+        "type": type(pool).__name__,
+        "size": size,
+        "checked_out": checked_out,
+        "checked_in": pool.checkedin(),
+        "overflow": overflow,
+        "max_overflow": max_overflow,
+        "saturated": max_overflow >= 0 and checked_out >= size + max_overflow,
+    }
+
+def _engines() -> dict:
+    """Асинхронные движки приложения; пул чтения - только если он отдельный"""
+    from app import database
+    engines = {"engine": database.async_engine}
+    if database.async_read_engine is not database.async_engine:
+        engines["read_engine"] = database.async_read_engine
+    return engines
+
+async def _ping(engine) -> dict:
+    started = time.perf_counter()
+    try:
+        async def select_one():
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        await asyncio.wait_for(select_one(), HEALTH_DB_TIMEOUT)
+    except Exception as e:
+        error = "timeout" if isinstance(e, asyncio.TimeoutError) else f"{type(e).__name__}: {e}"
+        return {"ok": False, "latency_ms": _ms(time.perf_counter() - started), "error": error}
+    return {"ok": True, "latency_ms": _ms(time.perf_counter() - started)}
+
+async def probe_readiness() -> dict:
+    """Проверка без кеша: БД, пулы, event loop"""
+    started = time.perf_counter()
+    engines = _engines()
+    # Пулы - до SELECT 1, иначе проба сама займёт соединение
+    pools = {name: pool_stats(engine) for name, engine in engines.items()}
+    pings = await asyncio.gather(*(_ping(engine) for engine in engines.values()))
+    database = dict(zip(engines, pings))
+    failures = [f"database:{name}" for name, result in database.items() if not result["ok"]]
+    # Единственное соединение писателя SQLite занято почти всегда - о нём
+    # судим по задержке SELECT 1 (она включает ожидание соединения)
+    failures += [
+        f"pool:{name}" for name, stats in pools.items()
+        if stats.get("saturated") and stats["size"] + stats["max_overflow"] > 1
+    ]
+    if loop_lag.max_lag > HEALTH_MAX_LOOP_LAG:
+        failures.append("event_loop")
+    return {
+        "ready": not failures,
+        "failures": failures,
+        "database": database,
+        "pools": pools,
+        "event_loop": loop_lag.as_dict(),
+        "probe_ms": _ms(time.perf_counter() - started),
+    }
+
+class CachedProbe:
+    """Результат probe живёт ttl секунд; параллельные вызовы ждут одну проверку"""
+
+    def __init__(self, probe, ttl: float = HEALTH_CACHE_SECONDS):
+        self.probe = probe
+        self.ttl = ttl
+        self.result: Optional[dict] = None
+        self.checked_at = 0.0
+        self._running: Optional[asyncio.Future] = None
+
+    async def get(self) -> tuple:
+        """(результат, возраст в секундах)"""
+        now = time.monotonic()
+        if self.result is not None and now - self.checked_at < self.ttl:
+            return self.result, now - self.checked_at
+        if self._running is None:
+            self._running = asyncio.ensure_future(self._refresh())
+        running = self._running
+        await asyncio.shield(running)
+        return self.result, time.monotonic() - self.checked_at
+
+    async def _refresh(self):
+        try:
+            try:
+                self.result = await self.probe()
+            except Exception as e:
+                # Упавшая проверка - это "не готов", а не 500 у всех ожидающих
+                self.result = {"ready": False, "failures": ["probe"], "error": f"{type(e).__name__}: {e}"}
+            self.checked_at = time.monotonic()
+        finally:
+            self._running = None
+
+    def clear(self):
+        self.result = None
+
+readiness_probe = CachedProbe(probe_readiness)
+
+@register_collector
+def _health_metrics():
+    yield from gauge_lines("app_event_loop_lag_seconds", "Event loop lag, last measurement",
+                           {"": round(loop_lag.lag, 6)})
+    from app import database
+    values = {}
+    for name in ("async_engine", "async_read_engine"):
+        engine = database._lazy_objects.get(name)  # Метрики не создают движки
+        if engine is None:
+            continue
+        stats = pool_stats(engine)
+        if "checked_out" in stats:
+            values[f'engine="{name}"'] = stats["checked_out"]
+    yield from gauge_lines("db_pool_checked_out", "Connections checked out of the pool", values)
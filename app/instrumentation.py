@@ -0,0 +1,159 @@
+import logging
+import os
+import time
+from collections import Counter as ShapeCounter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from app.metrics import Counter, Histogram
+from app.tracing import current_trace
+
+logger = logging.getLogger(__name__)
+
+# ИНСТРУМЕНТАЦИЯ SQL
+# Вместо echo=True: события движка считают запросы и время SQL для текущего
+# HTTP-запроса (через contextvar), middleware выгружает итог в гистограммы
+# /metrics. Детектор N+1 (SQL_N1_DETECT=1) ищет одинаковые по форме запросы,
+# повторённые SQL_N1_THRESHOLD и более раз за один запрос.
+SQL_N1_DETECT = os.getenv("SQL_N1_DETECT", "0") == "1"
+SQL_N1_THRESHOLD = int(os.getenv("SQL_N1_THRESHOLD", "5"))
+
+SQL_QUERIES = Histogram(
+    "sql_queries_per_request", "SQL statements executed per HTTP request",
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100), labelnames=("route",),
+)
+SQL_SECONDS = Histogram(
+    "sql_seconds_per_request", "Total SQL time per HTTP request, seconds",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0), labelnames=("route",),
+)
+SQL_SLOWEST = Histogram(
+    "sql_slowest_statement_seconds", "Slowest SQL statement per HTTP request, seconds",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0), labelnames=("route",),
+)
+SQL_N_PLUS_ONE = Counter(
+    "sql_n_plus_one_total", "Requests with repeated SQL statement shapes", labelnames=("route",),
+)
+
+class SQLStats:
+    """Статистика SQL в рамках одного запроса"""
+
+    __slots__ = ("query_count", "total_time", "slowest_time", "slowest_statement", "shapes")
+
+    def __init__(self):
+        self.query_count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.shapes = ShapeCounter() if SQL_N1_DETECT else None
+
+    def record(self, statement: str, elapsed: float):
+        self.query_count += 1
+        self.total_time += elapsed
+        if elapsed > self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = statement
+        if self.shapes is not None:
+            # Параметры уже вынесены в bind-переменные: одинаковый текст = одна форма
+            self.shapes[statement] += 1
+
+    def repeated_shapes(self, threshold: int = SQL_N1_THRESHOLD) -> dict:
+        """Формы запросов, повторённые threshold и более раз"""
+        if self.shapes is None:
+            return {}
+        return {shape: count for shape, count in self.shapes.items() if count >= threshold}
+
+    def as_dict(self) -> dict:
+        return {
+            "query_count": self.query_count,
+            "total_time": self.total_time,
+            "slowest_time": self.slowest_time,
+            "slowest_statement": self.slowest_statement,
+        }
+
+_current_stats: ContextVar[Optional[SQLStats]] = ContextVar("sql_stats", default=None)
+
+def current_sql_stats() -> Optional[SQLStats]:
+    """Статистика SQL текущего запроса (None вне отслеживания)"""
+    return _current_stats.get()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start"].pop()
+    elapsed = time.perf_counter() - started
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    trace = current_trace()
+    if trace is not None and trace.sampled:
+        trace.add("sql", started, elapsed, statement)
+
+def _handle_error(exception_context):
+    # Упавший запрос не доходит до after_cursor_execute: без этого время его
+    # начала осталось бы в conn.info (он живёт вместе с соединением пула)
+    # и сбило бы время следующих запросов
+    conn = exception_context.connection
+    if conn is not None and exception_context.execution_context is not None:
+        starts = conn.info.get("query_start")
+        if starts:
+            starts.pop()
+
+def instrument_engine(engine):
+    """Подключает счётчики SQL к движку (для async - к engine.sync_engine)"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+def _report_repeated(stats: SQLStats, where: str) -> bool:
+    repeated = stats.repeated_shapes()
+    for shape, count in repeated.items():
+        logger.warning("Possible N+1 in %s: %d x %s", where, count, " ".join(shape.split()))
+    return bool(repeated)
+
+@contextmanager
+def track_sql(where: str = "block"):
+    """
+    Отслеживает SQL внутри блока (скрипты, фоновые задачи):
+
+        with track_sql("init_db") as stats:
+            ...
+        print(stats.query_count)
+    """
+    stats = SQLStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+        _report_repeated(stats, where)
+
+class SQLMetricsMiddleware:
+    """
+    ASGI middleware: собирает SQL-статистику каждого HTTP-запроса.
+    Статистика доступна обработчику как request.state.sql и после ответа
+    попадает в гистограммы с меткой шаблона маршрута.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = SQLStats()
+        scope.setdefault("state", {})["sql"] = stats
+        token = _current_stats.set(stats)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_stats.reset(token)
+            route = scope.get("route")
+            label = getattr(route, "path", "unmatched")
+            SQL_QUERIES.observe(stats.query_count, label)
+            SQL_SECONDS.observe(stats.total_time, label)
+            SQL_SLOWEST.observe(stats.slowest_time, label)
+            if _report_repeated(stats, label):
+                SQL_N_PLUS_ONE.inc(label)
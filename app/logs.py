@@ -0,0 +1,216 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from starlette.datastructures import MutableHeaders
+from app.metrics import Counter
+
+# ЛОГИРОВАНИЕ
+# Обработчики запросов не пишут в stdout/stderr сами: запись лога - это
+# put_nowait в ограниченную очередь, а форматирование и вывод делает
+# отдельный поток QueueListener. Если очередь заполнена (вывод не успевает),
+# записи отбрасываются и считаются в log_records_dropped_total - медленный
+# терминал или pipe не тормозит запросы. Одинаковые сообщения (тот же
+# шаблон, уровень и логгер) сверх LOG_REPEAT_BURST за LOG_REPEAT_WINDOW
+# секунд тоже отбрасываются; первая запись следующего окна несёт поле
+# suppressed с числом пропущенных. Журнал доступа uvicorn (один шаблон на
+# все запросы) этим ограничением не режется.
+# LOG_FORMAT=json - по строке JSON на запись, text - для чтения глазами.
+# Каждая запись внутри HTTP-запроса получает request_id (заголовок
+# X-Request-ID клиента или сгенерированный), он же возвращается в ответе.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_REPEAT_BURST = int(os.getenv("LOG_REPEAT_BURST", "10"))
+LOG_REPEAT_WINDOW = float(os.getenv("LOG_REPEAT_WINDOW", "60"))
+LOG_REPEAT_MAX_KEYS = 10000
+
+REQUEST_ID_HEADER = "x-request-id"
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+LOG_DROPPED = Counter(
+    "log_records_dropped_total", "Log records dropped by the rate limiter or a full queue", labelnames=("reason",),
+)
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+def current_request_id() -> Optional[str]:
+    return request_id_var.get()
+
+class RequestIdFilter(logging.Filter):
+    """Добавляет к записи request_id текущего запроса ("-" вне запроса)"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get() or "-"
+        return True
+
+class RepeatFilter(logging.Filter):
+    """Пропускает не больше burst одинаковых сообщений за window секунд"""
+
+    def __init__(self, burst: int = LOG_REPEAT_BURST, window: float = LOG_REPEAT_WINDOW,
+                 max_keys: int = LOG_REPEAT_MAX_KEYS, exempt: tuple = ("uvicorn.access",)):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.max_keys = max_keys
+        self.exempt = frozenset(exempt)
+        self._seen = {}  # (логгер, уровень, шаблон) -> [начало окна, число записей]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        # Ключ - шаблон сообщения, а не готовый текст: "Invalid token: %s"
+        # с разными ошибками считается одним сообщением
+        if record.name in self.exempt:
+            return True
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry is None or now - entry[0] >= self.window:
+                if entry is not None and entry[1] > self.burst:
+                    record.suppressed = entry[1] - self.burst
+                if entry is None and len(self._seen) >= self.max_keys:
+                    del self._seen[next(iter(self._seen))]
+                self._seen[key] = [now, 1]
+                return True
+            entry[1] += 1
+            if entry[1] <= self.burst:
+                return True
+        LOG_DROPPED.inc("rate_limited")
+        return False
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler, который отбрасывает запись вместо ожидания места в очереди"""
+
+    def prepare(self, record):
+        # В потоке запроса - только то, что нельзя отложить: подстановка
+        # аргументов (они могут измениться) и текст исключения
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_DROPPED.inc("queue_full")
+
+class JsonFormatter(logging.Formatter):
+    """Одна строка JSON на запись"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+            "pid": record.process,
+        }
+        suppressed = getattr(record, "suppressed", None)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+def make_formatter(fmt: str = LOG_FORMAT) -> logging.Formatter:
+    if fmt == "json":
+        return JsonFormatter()
+    return logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+_handler: Optional[NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+_setup_lock = threading.Lock()
+
+def _start_listener(output: logging.Handler):
+    global _listener
+    _handler.queue = queue.Queue(LOG_QUEUE_SIZE)
+    _listener = QueueListener(_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, stream=None) -> NonBlockingQueueHandler:
+    """
+    Подключает к корневому логгеру обработчик-очередь (один раз на процесс).
+    Вывод - в stream (по умолчанию stderr) из фонового потока.
+    """
+    global _handler
+    with _setup_lock:
+        if _handler is not None:
+            return _handler
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(make_formatter(fmt))
+        _handler = NonBlockingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        _handler.addFilter(RequestIdFilter())
+        _handler.addFilter(RepeatFilter())
+        _start_listener(output)
+        root = logging.getLogger()
+        root.addHandler(_handler)
+        root.setLevel(level)
+        atexit.register(stop_logging)
+        return _handler
+
+def stop_logging():
+    """Дописывает очередь и останавливает поток вывода"""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+def _restart_after_fork():
+    # Поток вывода не переживает fork: воркеру - своя очередь и свой поток
+    if _handler is not None and _listener is not None:
+        _start_listener(_listener.handlers[0])
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware: request_id из X-Request-ID (если он приемлемого вида)
+    или новый uuid4; доступен логам через contextvar и уходит в ответ.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER.encode():
+                value = value.decode("latin-1")
+                if _REQUEST_ID_RE.match(value):
+                    request_id = value
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
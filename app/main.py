@@ -1,12 +1,62 @@
+import asyncio
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
+from app.assets import STATIC_ROOT, PrecompressedStaticFiles
+from app.compression import CompressionMiddleware
+from app.instrumentation import SQLMetricsMiddleware
+from app.logs import RequestIdMiddleware, setup_logging
+from app.tracing import TracingMiddleware
+from app.metrics import render_metrics
+from app.routers import admin, public
+from app import health, static_site, warmup
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Прогрев до приёма запросов (или фоном) и освобождение ресурсов при остановке"""
+    task = None
+    health.loop_lag.start()
+    if static_site.STATIC_AUTO_REBUILD:
+        static_site.static_rebuilder.start()
+    if not warmup.WARMUP_ENABLED:
+        warmup.warmup_state.done = True
+    elif warmup.WARMUP_IN_BACKGROUND:
+        task = asyncio.create_task(warmup.warm_up_and_retry())
+    else:
+        await warmup.warm_up()
+        if warmup.warmup_state.errors:
+            # Упавшие шаги повторяются фоном: сервер уже принимает запросы,
+            # /health/ready отвечает 503, пока они не пройдут
+            task = asyncio.create_task(warmup.retry_failed())
+    yield
+    if task is not None and not task.done():
+        task.cancel()
+    await health.loop_lag.stop()
+    await static_site.static_rebuilder.stop()
+    from app.auth import shutdown_hash_pool
+    from app.database import dispose_engines
+    shutdown_hash_pool()
+    await dispose_engines()
+
+setup_logging()
 
 app = FastAPI(
     title="ARQ",
     description="Company website with vacancies management",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
+app.add_middleware(TracingMiddleware)  # Внутри SQLMetricsMiddleware: берёт его статистику SQL
+app.add_middleware(SQLMetricsMiddleware)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(RequestIdMiddleware)  # Внешний: request_id есть у всех логов запроса
+
+app.include_router(public.router)
+app.include_router(admin.router)
+# В продакшене /static/ отдаёт nginx из того же STATIC_ROOT (gzip_static/brotli_static)
+app.mount("/static", PrecompressedStaticFiles(directory=STATIC_ROOT, check_dir=False), name="static")
+
 @app.get("/")
 async def home():
     return {"message": "Hello ARQ!", "status": "ok"}
@@ -14,3 +64,26 @@ async def home():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/health/live")
+async def liveness():
+    """Процесс жив: ответ без обращения к БД"""
+    return {"status": "alive", "event_loop": health.loop_lag.as_dict()}
+
+@app.get("/health/ready")
+async def readiness():
+    """
+    Готовность принимать трафик: 503, пока идёт прогрев, недоступна БД,
+    исчерпан пул или event loop перегружен. Проверка кешируется.
+    """
+    state = warmup.warmup_state
+    if not state.ready:
+        return JSONResponse({"status": "warming_up", "warmup": state.as_dict()}, status_code=503)
+    result, age = await health.readiness_probe.get()
+    body = {"status": "ready" if result["ready"] else "not_ready", "warmup": state.as_dict(),
+            "checked_ms_ago": round(age * 1000, 3), **result}
+    return JSONResponse(body, status_code=200 if result["ready"] else 503)
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return render_metrics()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import Column, Integer, Float, String, Text, DateTime, Boolean, Index, DDL, event, inspect
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -10,9 +10,114 @@ class Vacancy(Base):
     title = Column(String(200), nullable=False, index=True)
     description = Column(Text, nullable=False)
     requirements = Column(Text, nullable=True)  # Можно добавить отдельно
+    # Начало описания для списков: списки не читают description целиком
+    excerpt = Column(String(255), nullable=True)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Заполняется и при создании: по нему строится лента изменений.
+    # default - на стороне клиента: в таблицах, созданных до ленты, у колонки
+    # нет DEFAULT в схеме, а create_all существующие таблицы не меняет
+    updated_at = Column(DateTime(timezone=True), default=func.now(), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Покрывающий индекс для keyset-пагинации публичного списка:
+        # WHERE is_active = ? ORDER BY created_at DESC, id DESC
+        Index("ix_vacancies_active_created_id", "is_active", "created_at", "id"),
+        # Лента изменений: WHERE (updated_at, id) > (?, ?) ORDER BY updated_at, id
+        Index("ix_vacancies_updated_id", "updated_at", "id"),
+    )
+
+EXCERPT_LENGTH = 200
+
+def make_excerpt(text: str, length: int = EXCERPT_LENGTH) -> str:
+    """Первые length символов текста без переносов, обрезанные по слову"""
+    text = " ".join((text or "").split())
+    if len(text) <= length:
+        return text
+    cut = text[:length].rsplit(" ", 1)[0] or text[:length]
+    return cut.rstrip(" .,;:-") + "…"
+
+@event.listens_for(Vacancy, "before_insert")
+@event.listens_for(Vacancy, "before_update")
+def _update_excerpt(mapper, connection, target):
+    if target.excerpt is None or inspect(target).attrs.description.history.has_changes():
+        target.excerpt = make_excerpt(target.description)
+
+# Полнотекстовый поиск по вакансиям (SQLite FTS5).
+# External content таблица: текст хранится только в vacancies, индекс -
+# в vacancies_fts. unicode61 приводит к нижнему регистру и кириллицу.
+# Триггеры держат индекс в синхронизации при insert/update/delete,
+# в том числе для изменений в обход ORM.
+VACANCY_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS vacancies_fts USING fts5(
+        title, description, requirements,
+        content='vacancies', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS vacancies_fts_ai AFTER INSERT ON vacancies BEGIN
+        INSERT INTO vacancies_fts(rowid, title, description, requirements)
+        VALUES (new.id, new.title, new.description, new.requirements);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS vacancies_fts_ad AFTER DELETE ON vacancies BEGIN
+        INSERT INTO vacancies_fts(vacancies_fts, rowid, title, description, requirements)
+        VALUES ('delete', old.id, old.title, old.description, old.requirements);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS vacancies_fts_au
+    AFTER UPDATE OF title, description, requirements ON vacancies BEGIN
+        INSERT INTO vacancies_fts(vacancies_fts, rowid, title, description, requirements)
+        VALUES ('delete', old.id, old.title, old.description, old.requirements);
+        INSERT INTO vacancies_fts(rowid, title, description, requirements)
+        VALUES (new.id, new.title, new.description, new.requirements);
+    END
+    """,
+]
+
+for _statement in VACANCY_FTS_DDL:
+    event.listen(Vacancy.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+class VacancyTombstone(Base):
+    """
+    Запись об удалённой вакансии для ленты изменений.
+    Заполняется триггером, поэтому ловит и удаления в обход ORM.
+    """
+    __tablename__ = "vacancy_tombstones"
+
+    id = Column(Integer, primary_key=True)
+    vacancy_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_vacancy_tombstones_deleted_id", "deleted_at", "vacancy_id"),
+    )
+
+VACANCY_TOMBSTONE_DDL = """
+    CREATE TRIGGER IF NOT EXISTS vacancies_tombstone_ad AFTER DELETE ON vacancies BEGIN
+        INSERT INTO vacancy_tombstones(vacancy_id, deleted_at) VALUES (old.id, CURRENT_TIMESTAMP);
+    END
+"""
+
+event.listen(
+    VacancyTombstone.__table__, "after_create",
+    DDL(VACANCY_TOMBSTONE_DDL).execute_if(dialect="sqlite"),
+)
+
+class TableVersion(Base):
+    """
+    Версия таблицы для условных GET: version растёт при каждой записи,
+    updated_at - время последнего изменения (UTC). Чтение - один поиск по PK.
+    """
+    __tablename__ = "table_versions"
+
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=True)    # UTC
 
 class AdminUser(Base):
     """Модель администратора для авторизации"""
@@ -23,3 +128,24 @@ class AdminUser(Base):
     #hashed_password = Column(String(128), nullable=False)
     hashed_password = Column(String(255), nullable=False)  # Argon2 хеши длиннее
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # UNIX-время отзыва всех access-токенов (смена пароля, кража refresh-токена):
+    # токены с iat не позже него не принимаются ни одним процессом
+    tokens_valid_after = Column(Float, nullable=True)
+
+class RefreshToken(Base):
+    """
+    Refresh-токен администратора. Хранится только SHA-256 хеш токена.
+    Токены одной цепочки ротации имеют общий family_id: повторное
+    использование уже заменённого (replaced_at) токена отзывает всю цепочку,
+    токен после выхода просто недействителен.
+    """
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    token_hash = Column(String(64), unique=True, nullable=False, index=True)
+    family_id = Column(String(32), nullable=False, index=True)
+    username = Column(String(50), nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False)   # UTC
+    revoked_at = Column(DateTime, nullable=True)    # UTC, заполняется при ротации и отзыве
+    replaced_at = Column(DateTime, nullable=True)   # UTC, только при ротации: признак кражи при повторе
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,58 @@
+from sqlalchemy import String, bindparam, select, text, tuple_, type_coerce
+from app.models import AdminUser, Vacancy
+
+# ЗАПРОСЫ ДЛЯ СПИСКОВ
+# Списки читают только короткие колонки (id, title, excerpt, даты) через Core:
+# description/requirements не покидают БД, а строки - легковесные Row без
+# identity map и отслеживания изменений ORM. Выражения собраны один раз при
+# импорте, параметры - bindparam, поэтому SQL компилируется однажды и дальше
+# берётся из кеша компиляции SQLAlchemy. Полный текст читается только
+# в карточке вакансии.
+vacancies = Vacancy.__table__
+admin_users = AdminUser.__table__
+
+# created_at сравнивается как хранимое значение (в SQLite это строка).
+# Серверный CURRENT_TIMESTAMP пишет секунды без микросекунд, а Python-параметр
+# сериализуется с микросекундами - при сравнении datetime-параметром строки
+# одной секунды "съезжали" бы. type_coerce не добавляет CAST, индекс работает.
+created_key = type_coerce(vacancies.c.created_at, String)
+
+VACANCY_SUMMARY_COLUMNS = (
+    vacancies.c.id,
+    vacancies.c.title,
+    vacancies.c.excerpt,
+    vacancies.c.is_active,
+    vacancies.c.created_at,
+    vacancies.c.updated_at,
+)
+
+# Страница публичного списка: WHERE is_active = ? ORDER BY created_at DESC, id DESC
+VACANCY_PAGE = (
+    select(*VACANCY_SUMMARY_COLUMNS, created_key.label("created_key"))
+    .where(vacancies.c.is_active == bindparam("is_active"))
+    .order_by(created_key.desc(), vacancies.c.id.desc())
+    .limit(bindparam("limit"))
+)
+VACANCY_PAGE_AFTER = VACANCY_PAGE.where(
+    tuple_(created_key, vacancies.c.id) < tuple_(bindparam("created_key"), bindparam("after_id"))
+)
+
+# Поиск: те же короткие колонки, порядок по bm25 (заголовок важнее описания)
+VACANCY_SEARCH = text("""
+    SELECT vacancies.id, vacancies.title, vacancies.excerpt, vacancies.is_active,
+           vacancies.created_at, vacancies.updated_at
+    FROM vacancies_fts
+    JOIN vacancies ON vacancies.id = vacancies_fts.rowid
+    WHERE vacancies_fts MATCH :match AND vacancies.is_active = 1
+    ORDER BY bm25(vacancies_fts, 10.0, 1.0, 2.0)
+    LIMIT :limit
+""").columns(*VACANCY_SUMMARY_COLUMNS)
+
+# Все вакансии для консольных списков
+ALL_VACANCY_SUMMARIES = select(*VACANCY_SUMMARY_COLUMNS).order_by(vacancies.c.id)
+
+# Администраторы без хешей паролей
+ADMIN_LIST = (
+    select(admin_users.c.id, admin_users.c.username, admin_users.c.created_at)
+    .order_by(admin_users.c.created_at)
+)
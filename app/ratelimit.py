@@ -0,0 +1,140 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from app.metrics import Counter
+
+# ОГРАНИЧЕНИЕ ЧАСТОТЫ ВХОДОВ
+# Token bucket по IP клиента и по имени пользователя. Проверка стоит
+# микросекунды и выполняется до поиска пользователя и Argon2, поэтому лишние
+# попытки входа отклоняются (429) раньше, чем займут 64MB и CPU.
+# По умолчанию корзины живут в памяти процесса; с LOGIN_RATE_LIMIT_DB=<файл>
+# все воркеры делят счётчики через небольшую отдельную БД SQLite.
+LOGIN_IP_BURST = float(os.getenv("LOGIN_IP_BURST", "10"))
+LOGIN_IP_PER_MINUTE = float(os.getenv("LOGIN_IP_PER_MINUTE", "10"))
+LOGIN_USER_BURST = float(os.getenv("LOGIN_USER_BURST", "5"))
+LOGIN_USER_PER_MINUTE = float(os.getenv("LOGIN_USER_PER_MINUTE", "1"))
+LOGIN_RATE_LIMIT_DB = os.getenv("LOGIN_RATE_LIMIT_DB")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+RATE_LIMITED = Counter(
+    "login_rate_limited_total", "Login attempts rejected by the rate limiter", labelnames=("scope",),
+)
+
+class MemoryBucketStore:
+    """Корзины в памяти процесса; самые старые вытесняются сверх max_keys"""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated)
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: float, now: float) -> bool:
+        """Забирает один токен; False если корзина пуста"""
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return allowed
+
+class SQLiteBucketStore:
+    """
+    Корзины в файле SQLite, общие для всех воркеров.
+    Пополнение и списание - один атомарный UPSERT.
+    """
+
+    _TAKE_SQL = """
+        INSERT INTO rate_buckets (key, tokens, updated) VALUES (:key, :burst - 1, :now)
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = min(:burst, tokens + (:now - updated) * :rate) - 1,
+            updated = :now
+        WHERE min(:burst, tokens + (:now - updated) * :rate) >= 1
+        RETURNING tokens
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_buckets "
+                "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")  # Потеря счётчиков при сбое не критична
+            self._local.conn = conn
+        return conn
+
+    def take(self, key: str, rate: float, burst: float, now: float) -> bool:
+        conn = self._connect()
+        row = conn.execute(self._TAKE_SQL, {"key": key, "rate": rate, "burst": burst, "now": now}).fetchone()
+        return row is not None
+
+class TokenBucketLimiter:
+    """Token bucket: burst попыток сразу, затем rate попыток в секунду"""
+
+    def __init__(self, scope: str, burst: float, per_minute: float, store):
+        self.scope = scope
+        self.burst = burst
+        self.rate = per_minute / 60
+        self.store = store
+
+    @property
+    def retry_after(self) -> int:
+        """Через сколько секунд в пустой корзине появится токен"""
+        return max(1, math.ceil(1 / self.rate)) if self.rate > 0 else 60
+
+    def allow(self, key: str, now: Optional[float] = None) -> bool:
+        allowed = self.store.take(f"{self.scope}:{key}", self.rate, self.burst, time.time() if now is None else now)
+        if not allowed:
+            RATE_LIMITED.inc(self.scope)
+        return allowed
+
+def _make_store():
+    return SQLiteBucketStore(LOGIN_RATE_LIMIT_DB) if LOGIN_RATE_LIMIT_DB else MemoryBucketStore()
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_bucket_store():
+    """Хранилище корзин, создаётся при первой попытке входа"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _make_store()
+    return _store
+
+def _forget_store():
+    # Соединение SQLite родителя воркеру не подходит, корзины в памяти - тоже
+    global _store
+    _store = None
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_store)
+
+def check_login_rate(client_ip: str, username: str) -> Optional[int]:
+    """
+    Списывает попытку входа из корзин IP и пользователя.
+    Возвращает None, если вход разрешён, иначе Retry-After в секундах.
+    """
+    store = get_bucket_store()
+    by_ip = TokenBucketLimiter("ip", LOGIN_IP_BURST, LOGIN_IP_PER_MINUTE, store)
+    if not by_ip.allow(client_ip):
+        return by_ip.retry_after
+    by_user = TokenBucketLimiter("username", LOGIN_USER_BURST, LOGIN_USER_PER_MINUTE, store)
+    if not by_user.allow(username.lower()):
+        return by_user.retry_after
+    return None
@@ -0,0 +1,121 @@
+import secrets
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import crud, database
+from app.auth import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    HashPoolSaturated,
+    create_access_token,
+    get_password_hash_async,
+    password_needs_rehash,
+    revoke_token,
+    revoke_user_tokens,
+    verify_password_async,
+)
+from app.database import get_async_db, get_async_read_db
+from app.dependencies import bearer_scheme, get_current_admin, login_rate_limit
+from app.models import AdminUser
+from app.schemas import LoginRequest, RefreshRequest, Token
+
+router = APIRouter(prefix="/auth", tags=["auth"])
+
+# Хеш для несуществующих пользователей: проверка идёт так же долго,
+# как для настоящих, и по времени ответа нельзя перебирать логины
+_dummy_hash: Optional[str] = None
+
+async def _get_dummy_hash() -> str:
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = await get_password_hash_async(secrets.token_urlsafe(16))
+    return _dummy_hash
+
+def _token_response(username: str, refresh_token: str) -> dict:
+    return {
+        "access_token": create_access_token({"sub": username}),
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        "refresh_token": refresh_token,
+    }
+
+async def _rehash_password(admin_id: int, old_hash: str, password: str):
+    """Пересчитывает хеш с текущими параметрами Argon2 (после ответа на вход)"""
+    try:
+        new_hash = await get_password_hash_async(password)
+    except HashPoolSaturated:
+        return  # Пул занят входами - пересчитаем при следующем входе
+    async with database.AsyncSessionLocal() as db:
+        await crud.update_password_hash(db, admin_id, old_hash, new_hash)
+
+@router.post("/login", response_model=Token, dependencies=[Depends(login_rate_limit)])
+async def login(
+    form: LoginRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Вход администратора: проверка пароля, выдача JWT и refresh-токена.
+    Пока считается Argon2, соединение с БД не занято: у писателя SQLite
+    оно одно, и иначе все входы (и refresh, и logout) шли бы по очереди.
+    """
+    result = await db.execute(
+        select(AdminUser.id, AdminUser.username, AdminUser.hashed_password).filter_by(username=form.username)
+    )
+    admin = result.first()
+    await db.rollback()  # Соединение возвращается в пул до хеширования
+    try:
+        if admin is None:
+            await verify_password_async(form.password, await _get_dummy_hash())
+            valid = False
+        else:
+            valid = await verify_password_async(form.password, admin.hashed_password)
+    except HashPoolSaturated:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many login attempts in progress",
+            headers={"Retry-After": "1"},
+        )
+    if not valid:
+        raise HTTPException(status_code=401, detail="Incorrect username or password")
+    if password_needs_rehash(admin.hashed_password):
+        background_tasks.add_task(_rehash_password, admin.id, admin.hashed_password, form.password)
+    # Короткая транзакция писателя - только запись refresh-токена
+    async with database.AsyncSessionLocal() as write_db:
+        refresh_token = crud.issue_refresh_token(write_db, admin.username)
+        await write_db.commit()
+    return _token_response(admin.username, refresh_token)
+
+@router.post("/refresh", response_model=Token)
+async def refresh(body: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Новый access-токен по refresh-токену - без Argon2.
+    Refresh-токен при этом заменяется новым (ротация).
+    """
+    try:
+        username, refresh_token = await crud.rotate_refresh_token(db, body.refresh_token)
+    except crud.RefreshTokenReused as e:
+        # Украденный или повторно отправленный токен: цепочка уже отозвана,
+        # выданные по ней access-токены тоже больше не принимаются
+        await crud.set_tokens_valid_after(db, e.username, revoke_user_tokens(e.username))
+        raise HTTPException(status_code=401, detail="Refresh token reuse detected")
+    except crud.RefreshTokenError:
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+    return _token_response(username, refresh_token)
+
+@router.post("/logout", status_code=204)
+async def logout(
+    body: Optional[RefreshRequest] = None,
+    admin: dict = Depends(get_current_admin),
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Выход: access-токен и цепочка refresh-токена отзываются"""
+    revoke_token(credentials.credentials)
+    if body is not None:
+        await crud.revoke_refresh_token(db, body.refresh_token)
+
+@router.get("/me")
+async def me(admin: dict = Depends(get_current_admin)):
+    """Текущий администратор по JWT токену"""
+    return {"username": admin["sub"]}
@@ -0,0 +1,152 @@
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import crud
+from app.cache import VACANCY_VERSION_TTL, VERSION_KEY, detail_key, list_key, vacancy_cache
+from app import database
+from app.database import get_async_read_db
+from app.schemas import VacancyChange, VacancyChangePage, VacancyList, VacancyOut, VacancyPage, VacancySummary
+from app.tracing import span
+
+router = APIRouter(tags=["public"])
+
+def _json(body: bytes, headers: dict) -> Response:
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def vacancy_version() -> tuple:
+    """
+    (version, updated_at) таблицы вакансий: из памяти (не дольше
+    VACANCY_VERSION_TTL) или одним чтением по PK
+    """
+    stamp = vacancy_cache.get(VERSION_KEY)
+    if stamp is None:
+        generation = vacancy_cache.generation
+        async with database.AsyncReadSessionLocal() as db:
+            stamp = await crud.get_table_version(db, "vacancies")
+        vacancy_cache.put(VERSION_KEY, stamp, generation, ttl=VACANCY_VERSION_TTL)
+    return stamp
+
+def _validators(key: tuple, stamp: tuple) -> dict:
+    """
+    Заголовки валидации ответа. ETag строгий: при той же версии таблицы
+    и тех же параметрах запроса тело ответа совпадает байт в байт.
+    """
+    version, updated_at = stamp
+    digest = hashlib.blake2s(repr(key).encode(), digest_size=8).hexdigest()
+    headers = {"ETag": f'"{version}-{digest}"', "Cache-Control": "no-cache"}
+    if updated_at is not None:
+        headers["Last-Modified"] = format_datetime(updated_at.replace(tzinfo=timezone.utc), usegmt=True)
+    return headers
+
+def _not_modified(request: Request, headers: dict) -> bool:
+    """Проверка If-None-Match / If-Modified-Since (RFC 9110, 13.1)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or headers["ETag"] in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and "Last-Modified" in headers:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return parsedate_to_datetime(headers["Last-Modified"]) <= since
+    return False
+
+@router.get("/vacancies", response_model=VacancyPage)
+async def list_vacancies(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Публичный список активных вакансий с keyset-пагинацией.
+    Ответ берётся из кеша готовых JSON-байтов; сессия БД открывается
+    только при промахе. Условный запрос с актуальным ETag получает 304
+    без запроса списка.
+    """
+    # Версия читается до списка: иначе ETag мог бы оказаться новее тела
+    stamp = await vacancy_version()
+    key = list_key(stamp[0], cursor, limit)
+    headers = _validators(key, stamp)
+    if _not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+    try:
+        body = await cached_list_body(stamp[0], cursor, limit)
+    except crud.InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return _json(body, headers)
+
+async def cached_list_body(version: int, cursor: Optional[str], limit: int) -> bytes:
+    """JSON страницы списка версии version из кеша; при промахе - из БД с записью в кеш"""
+    key = list_key(version, cursor, limit)
+    body = vacancy_cache.get(key)
+    if body is None:
+        generation = vacancy_cache.generation
+        async with database.AsyncReadSessionLocal() as db:
+            items, next_cursor = await crud.list_vacancies(db, True, cursor, limit)
+            page = VacancyPage(
+                items=[VacancySummary.model_validate(item) for item in items],
+                next_cursor=next_cursor,
+            )
+        with span("serialize"):
+            body = page.model_dump_json().encode()
+        vacancy_cache.put(key, body, generation)
+    return body
+
+@router.get("/vacancies/search", response_model=VacancyList)
+async def search_vacancies(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Полнотекстовый поиск по заголовку, описанию и требованиям"""
+    return {"items": await crud.search_vacancies(db, q, limit)}
+
+@router.get("/vacancies/changes", response_model=VacancyChangePage)
+async def vacancy_changes(
+    since: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Лента изменений для партнёров: добавления, правки, снятия с публикации
+    и удаления по порядку. Без since - с самого начала; дальше - next_cursor
+    из предыдущего ответа, пока has_more.
+    """
+    try:
+        items, next_cursor, has_more = await crud.list_vacancy_changes(db, since, limit)
+    except crud.InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return VacancyChangePage(
+        items=[
+            VacancyChange(op=op, id=vacancy_id, changed_at=changed_at,
+                          vacancy=VacancyOut.model_validate(vacancy) if vacancy else None)
+            for op, vacancy_id, changed_at, vacancy in items
+        ],
+        next_cursor=next_cursor,
+        has_more=has_more,
+    )
+
+@router.get("/vacancies/{vacancy_id}", response_model=VacancyOut)
+async def get_vacancy(request: Request, vacancy_id: int):
+    """Карточка активной вакансии (через тот же кеш и ETag, что и список)"""
+    stamp = await vacancy_version()
+    key = detail_key(stamp[0], vacancy_id)
+    headers = _validators(key, stamp)
+    if _not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+    body = vacancy_cache.get(key)
+    if body is None:
+        generation = vacancy_cache.generation
+        async with database.AsyncReadSessionLocal() as db:
+            vacancy = await crud.get_vacancy(db, vacancy_id)
+            if vacancy is None:
+                raise HTTPException(status_code=404, detail="Vacancy not found")
+            with span("serialize"):
+                body = VacancyOut.model_validate(vacancy).model_dump_json().encode()
+        vacancy_cache.put(key, body, generation)
+    return _json(body, headers)
@@ -0,0 +1,64 @@
+from datetime import datetime
+from typing import Literal, Optional
+from pydantic import BaseModel, ConfigDict
+
+class VacancyOut(BaseModel):
+    """Вакансия в ответах публичного API"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    title: str
+    description: str
+    requirements: Optional[str] = None
+    is_active: bool
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class VacancySummary(BaseModel):
+    """Вакансия в списках: вместо полного текста - короткий анонс"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    title: str
+    excerpt: Optional[str] = None
+    is_active: bool
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class VacancyPage(BaseModel):
+    """Страница списка вакансий с курсором на следующую"""
+    items: list[VacancySummary]
+    next_cursor: Optional[str] = None
+
+class VacancyChange(BaseModel):
+    """Изменение вакансии: upsert несёт вакансию целиком, deactivate и delete - только id"""
+    op: Literal["upsert", "deactivate", "delete"]
+    id: int
+    changed_at: Optional[datetime] = None
+    vacancy: Optional[VacancyOut] = None
+
+class VacancyChangePage(BaseModel):
+    """Страница ленты изменений; next_cursor передаётся в since следующего запроса"""
+    items: list[VacancyChange]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+
+class VacancyList(BaseModel):
+    """Список вакансий без пагинации (результаты поиска)"""
+    items: list[VacancySummary]
+
+class LoginRequest(BaseModel):
+    """Данные для входа администратора"""
+    username: str
+    password: str
+
+class Token(BaseModel):
+    """Выданный JWT токен и refresh-токен для его продления"""
+    access_token: str
+    token_type: str = "bearer"
+    expires_in: int
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    """Запрос нового access-токена по refresh-токену"""
+    refresh_token: str
@@ -0,0 +1,240 @@
+import logging
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Optional
+from app.logs import setup_logging, stop_logging
+from app.tracing import flush_traces
+
+logger = logging.getLogger("uvicorn.error")
+
+# ПРЕДФОРК-СЕРВЕР ДЛЯ ПРОДАКШЕНА (python manage.py serve)
+# Мастер-процесс открывает сокет, загружает приложение и порождает воркеры
+# через fork; каждый воркер - отдельный uvicorn на общем сокете. Движки БД,
+# пул Argon2 и хранилище лимитов создаются в воркере заново (хуки
+# os.register_at_fork в app.database, app.auth, app.ratelimit), поэтому
+# соединения SQLite никогда не переходят через fork.
+#
+# Сигналы мастеру:
+#   TERM, INT - плавная остановка: воркеры дорабатывают начатые запросы
+#   HUP       - поочерёдный перезапуск воркеров без потери запросов
+#               (новый код подхватывается только с SERVE_PRELOAD=0)
+# Воркер перезапускается после SERVE_MAX_REQUESTS запросов (+ случайные
+# до SERVE_MAX_REQUESTS_JITTER, чтобы воркеры не уходили одновременно)
+# или когда его RSS превышает SERVE_MAX_MEMORY_MB.
+SERVE_HOST = os.getenv("SERVE_HOST", "0.0.0.0")
+SERVE_PORT = int(os.getenv("SERVE_PORT", "8000"))
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", "0"))  # 0 - по числу доступных CPU
+SERVE_PRELOAD = os.getenv("SERVE_PRELOAD", "1") == "1"
+SERVE_MAX_REQUESTS = int(os.getenv("SERVE_MAX_REQUESTS", "0"))  # 0 - без ограничения
+SERVE_MAX_REQUESTS_JITTER = int(os.getenv("SERVE_MAX_REQUESTS_JITTER", "0"))
+SERVE_MAX_MEMORY_MB = int(os.getenv("SERVE_MAX_MEMORY_MB", "0"))  # 0 - без ограничения
+SERVE_GRACEFUL_TIMEOUT = int(os.getenv("SERVE_GRACEFUL_TIMEOUT", "30"))
+
+MEMORY_CHECK_INTERVAL = 5.0
+MIN_WORKER_LIFETIME = 1.0  # Воркер, упавший быстрее, перезапускается с паузой
+
+def default_workers() -> int:
+    """Число воркеров по умолчанию: CPU, доступные процессу"""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+def rss_bytes() -> int:
+    """Текущий RSS процесса (Linux), иначе пиковый"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+class MemoryWatchdog(threading.Thread):
+    """Фоновый поток воркера: при превышении памяти просит uvicorn завершиться"""
+
+    def __init__(self, server, limit_bytes: int, interval: float = MEMORY_CHECK_INTERVAL):
+        super().__init__(name="memory-watchdog", daemon=True)
+        self.server = server
+        self.limit_bytes = limit_bytes
+        self.interval = interval
+
+    def run(self):
+        while not self.server.should_exit:
+            rss = rss_bytes()
+            if rss > self.limit_bytes:
+                logger.info("Worker %s uses %d MB of memory, recycling", os.getpid(), rss // 2**20)
+                self.server.should_exit = True  # Плавно: новые соединения не берутся, начатые дорабатывают
+                return
+            time.sleep(self.interval)
+
+class Arbiter:
+    """Мастер-процесс: держит сокет и заданное число воркеров"""
+
+    def __init__(self, app: str = "app.main:app", host: str = SERVE_HOST, port: int = SERVE_PORT,
+                 workers: int = SERVE_WORKERS, preload: bool = SERVE_PRELOAD,
+                 max_requests: int = SERVE_MAX_REQUESTS, max_requests_jitter: int = SERVE_MAX_REQUESTS_JITTER,
+                 max_memory_mb: int = SERVE_MAX_MEMORY_MB, graceful_timeout: int = SERVE_GRACEFUL_TIMEOUT):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.worker_count = workers or default_workers()
+        self.preload = preload
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.max_memory_mb = max_memory_mb
+        self.graceful_timeout = graceful_timeout
+        self.workers = {}     # pid -> время запуска
+        self.retiring = set() # pid воркеров, отправленных на плавную остановку
+        self.socket: Optional[socket.socket] = None
+        self.config = None
+        self._stopping = False
+        self._reload = False
+
+    def bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        self.socket = sock
+        self.port = sock.getsockname()[1]  # port=0 - выбранный системой
+        return sock
+
+    def load_config(self):
+        import uvicorn
+        app = self.app
+        if self.preload:
+            # Импорт в мастере: воркеры получают модули через copy-on-write и
+            # стартуют быстрее. Безопасно - движки и пулы создаются лениво.
+            from uvicorn.importer import import_from_string
+            app = import_from_string(self.app)
+        # log_config=None: uvicorn не ставит свои обработчики, его логгеры
+        # (uvicorn.error, uvicorn.access) уходят в очередь app.logs
+        self.config = uvicorn.Config(
+            app, lifespan="on", timeout_graceful_shutdown=self.graceful_timeout,
+            proxy_headers=True, server_header=False, log_config=None,
+        )
+        return self.config
+
+    # ВОРКЕРЫ
+    def spawn_worker(self) -> int:
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = time.monotonic()
+            return pid
+        exit_code = 0
+        try:
+            self.run_worker()
+        except BaseException:
+            logger.exception("Worker %s failed", os.getpid())
+            exit_code = 1
+        finally:
+            # atexit в воркере не сработает: дописать очереди логов и трасс
+            flush_traces()
+            stop_logging()
+            os._exit(exit_code)
+
+    def run_worker(self):
+        """Тело дочернего процесса: uvicorn на общем сокете"""
+        import uvicorn
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+            signal.signal(signum, signal.SIG_DFL)
+        if self.max_requests:
+            self.config.limit_max_requests = self.max_requests + random.randint(0, self.max_requests_jitter)
+        server = uvicorn.Server(self.config)
+        if self.max_memory_mb:
+            MemoryWatchdog(server, self.max_memory_mb * 2**20).start()
+        logger.info("Worker %s started", os.getpid())
+        server.run(sockets=[self.socket])
+
+    def reap_workers(self):
+        """Собирает завершившиеся воркеры; возвращает время жизни каждого"""
+        lifetimes = []
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            started = self.workers.pop(pid, None)
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+                continue
+            if started is not None:
+                lifetimes.append(time.monotonic() - started)
+                code = os.waitstatus_to_exitcode(status)
+                logger.info("Worker %s exited with code %s", pid, code)
+        return lifetimes
+
+    def rolling_restart(self):
+        """Каждый старый воркер сменяется новым: новый уже принимает, старый дорабатывает"""
+        for pid in list(self.workers):
+            if pid in self.retiring:
+                continue
+            self.spawn_worker()
+            self.retiring.add(pid)
+            self._kill(pid, signal.SIGTERM)
+
+    def stop(self):
+        """Плавная остановка всех воркеров; по истечении таймаута - SIGKILL"""
+        self.retiring.update(self.workers)
+        for pid in self.workers:
+            self._kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self.workers and time.monotonic() < deadline:
+            self.reap_workers()
+            time.sleep(0.1)
+        for pid in list(self.workers):
+            self._kill(pid, signal.SIGKILL)
+        while self.workers:
+            try:
+                pid, _ = os.waitpid(-1, 0)
+            except ChildProcessError:
+                break
+            self.workers.pop(pid, None)
+
+    @staticmethod
+    def _kill(pid: int, signum: int):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    # МАСТЕР
+    def _on_stop_signal(self, signum, frame):
+        self._stopping = True
+
+    def _on_reload_signal(self, signum, frame):
+        self._reload = True
+
+    def run(self):
+        setup_logging()  # До загрузки приложения: логи мастера - тоже через очередь
+        if self.socket is None:
+            self.bind()
+        self.load_config()
+        signal.signal(signal.SIGTERM, self._on_stop_signal)
+        signal.signal(signal.SIGINT, self._on_stop_signal)
+        signal.signal(signal.SIGHUP, self._on_reload_signal)
+        logger.info("Serving %s on %s:%s with %d workers (pid %s)",
+                    self.app, self.host, self.port, self.worker_count, os.getpid())
+        try:
+            while not self._stopping:
+                lifetimes = self.reap_workers()
+                if any(lifetime < MIN_WORKER_LIFETIME for lifetime in lifetimes):
+                    time.sleep(MIN_WORKER_LIFETIME)  # Не порождать воркеры в цикле, если они падают при старте
+                if self._reload:
+                    self._reload = False
+                    self.rolling_restart()
+                while len(self.workers) - len(self.retiring) < self.worker_count and not self._stopping:
+                    self.spawn_worker()
+                time.sleep(0.2)
+        finally:
+            logger.info("Shutting down %d workers", len(self.workers))
+            self.stop()
+            self.socket.close()
@@ -0,0 +1,8 @@
+// Отмечает текущий раздел в навигации
+document.addEventListener("DOMContentLoaded", () => {
+    for (const link of document.querySelectorAll("nav a")) {
+        if (link.pathname !== "/" && location.pathname.startsWith(link.pathname)) {
+            link.classList.add("font-semibold");
+        }
+    }
+});
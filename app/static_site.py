@@ -0,0 +1,263 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.assets import manifest_digest, static_url
+from app.models import Vacancy
+from app.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# СТАТИЧЕСКАЯ СБОРКА ПУБЛИЧНЫХ СТРАНИЦ
+# Лендинг, список и карточки вакансий рендерятся в HTML заранее, nginx отдаёт
+# их как файлы. Для каждой страницы хранится хеш входных данных (шаблоны +
+# контекст) - повторная сборка перерисовывает только изменившиеся страницы.
+# Все страницы лежат под SITE_URL (/jobs/): пути JSON API (/vacancies, /health
+# и т.д.) никогда не совпадают с файлами сборки и всегда доходят до приложения.
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATES_DIR = os.path.join(APP_DIR, "templates")
+STATIC_BUILD_DIR = os.getenv("STATIC_BUILD_DIR", os.path.join(os.path.dirname(APP_DIR), "build", "site"))
+STATIC_AUTO_REBUILD = os.getenv("STATIC_AUTO_REBUILD", "0") == "1"
+STATIC_REBUILD_DELAY = float(os.getenv("STATIC_REBUILD_DELAY", "2"))
+VACANCY_PAGE_SIZE = int(os.getenv("STATIC_VACANCY_PAGE_SIZE", "20"))
+LATEST_VACANCIES = 5
+SITE_URL = "/jobs/"
+
+BUILD_MANIFEST = ".build-manifest.json"
+
+_build_lock = threading.Lock()
+
+def page_url(number: int) -> str:
+    """URL страницы списка вакансий"""
+    return f"{SITE_URL}vacancies/" if number == 1 else f"{SITE_URL}vacancies/page/{number}/"
+
+def vacancy_url(vacancy_id: int) -> str:
+    """URL карточки вакансии"""
+    return f"{SITE_URL}vacancies/{vacancy_id}/"
+
+def page_path(url: str) -> str:
+    """Файл страницы в каталоге сборки: /jobs/vacancies/ -> jobs/vacancies/index.html"""
+    return url.strip("/") + "/index.html"
+
+@lru_cache(maxsize=1)
+def get_environment():
+    """
+    Jinja2 окружение шаблонов (jinja2 импортируется только для сборки).
+    Одно на процесс: скомпилированные шаблоны переиспользуются между
+    сборками, изменённые на диске перечитываются (auto_reload).
+    """
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR),
+        autoescape=select_autoescape(["html"]),
+    )
+    env.globals.update(static=static_url, site_url=SITE_URL, page_url=page_url, vacancy_url=vacancy_url)
+    return env
+
+def templates_hash() -> str:
+    """Хеш всех шаблонов: правка base.html меняет все страницы"""
+    digest = hashlib.sha256()
+    for root, _, files in sorted(os.walk(TEMPLATES_DIR)):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, TEMPLATES_DIR).encode())
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+def _vacancy_context(vacancy: Vacancy) -> dict:
+    return {
+        "id": vacancy.id,
+        "title": vacancy.title,
+        "description": vacancy.description,
+        "requirements": vacancy.requirements,
+        "excerpt": vacancy.excerpt,
+    }
+
+def collect_pages(db: Session) -> dict:
+    """Все страницы сайта: путь файла -> (шаблон, контекст)"""
+    vacancies = [
+        _vacancy_context(v) for v in db.execute(
+            select(Vacancy)
+            .where(Vacancy.is_active.is_(True))
+            .order_by(Vacancy.created_at.desc(), Vacancy.id.desc())
+        ).scalars()
+    ]
+    pages = {
+        page_path(SITE_URL): ("index.html", {
+            "latest": [{"id": v["id"], "title": v["title"]} for v in vacancies[:LATEST_VACANCIES]],
+            "total": len(vacancies),
+        }),
+    }
+    total_pages = max(1, -(-len(vacancies) // VACANCY_PAGE_SIZE))
+    for number in range(1, total_pages + 1):
+        # В списке только анонсы: правка хвоста описания не перерисовывает список
+        chunk = [
+            {"id": v["id"], "title": v["title"], "excerpt": v["excerpt"]}
+            for v in vacancies[(number - 1) * VACANCY_PAGE_SIZE:number * VACANCY_PAGE_SIZE]
+        ]
+        pages[page_path(page_url(number))] = ("vacancies/list.html", {"vacancies": chunk, "page": number, "pages": total_pages})
+    for vacancy in vacancies:
+        pages[page_path(vacancy_url(vacancy["id"]))] = ("vacancies/detail.html", {"vacancy": vacancy})
+    return pages
+
+def _page_hash(template_hash: str, template: str, context: dict) -> str:
+    raw = json.dumps([template_hash, template, context], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+def _write_atomic(path: str, data: bytes):
+    """Запись через временный файл: nginx никогда не видит недописанную страницу"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def _load_manifest(output_dir: str) -> dict:
+    try:
+        with open(os.path.join(output_dir, BUILD_MANIFEST)) as f:
+            return json.load(f).get("pages", {})
+    except (OSError, ValueError):
+        return {}
+
+def build_site(output_dir: str = None, engine=None, force: bool = False) -> dict:
+    """
+    Рендерит страницы в output_dir. Без force перерисовываются только
+    страницы с изменившимся хешем, страницы снятых вакансий удаляются.
+    Возвращает счётчики rendered/unchanged/removed.
+    """
+    from app import database
+
+    output_dir = output_dir or STATIC_BUILD_DIR
+    engine = engine or database.read_engine
+    with _build_lock:
+        with Session(engine) as db:
+            # Версия - до чтения страниц: если запись пройдёт между ними,
+            # следующая проверка увидит более новую версию и соберёт ещё раз
+            version = _table_version(db)
+            pages = collect_pages(db)
+        previous = {} if force else _load_manifest(output_dir)
+        # Новый collectstatic меняет URL статики во всех страницах
+        template_hash = templates_hash() + manifest_digest()
+        env = get_environment()
+        manifest = {}
+        stats = {"rendered": 0, "unchanged": 0, "removed": 0}
+
+        for path, (template, context) in pages.items():
+            page_hash = _page_hash(template_hash, template, context)
+            manifest[path] = page_hash
+            if previous.get(path) == page_hash and os.path.exists(os.path.join(output_dir, path)):
+                stats["unchanged"] += 1
+                continue
+            with span("render", path):
+                html = env.get_template(template).render(**context)
+            _write_atomic(os.path.join(output_dir, path), html.encode())
+            stats["rendered"] += 1
+
+        for path in set(previous) - set(manifest):
+            full_path = os.path.join(output_dir, path)
+            if os.path.exists(full_path):
+                os.remove(full_path)
+                try:
+                    os.removedirs(os.path.dirname(full_path))  # Пустые каталоги страницы
+                except OSError:
+                    pass
+            stats["removed"] += 1
+
+        _write_atomic(
+            os.path.join(output_dir, BUILD_MANIFEST),
+            json.dumps({"pages": manifest, "version": version}, indent=2, sort_keys=True).encode(),
+        )
+        return stats
+
+# АВТОМАТИЧЕСКАЯ ПЕРЕСБОРКА
+# С STATIC_AUTO_REBUILD=1 сервер раз в STATIC_REBUILD_DELAY секунд сверяет
+# версию таблицы вакансий (table_versions) с версией последней сборки из
+# манифеста и при расхождении пересобирает сайт. Версию поднимает любая
+# запись - через ORM, импорт через Core, скрипты в других процессах.
+# Воркеры serve собирают по очереди под блокировкой файла: следующий видит
+# в манифесте уже собранную версию и ничего не делает.
+def _table_version(db: Session) -> int:
+    from app.models import TableVersion
+    version = db.execute(
+        select(TableVersion.version).where(TableVersion.name == Vacancy.__tablename__)
+    ).scalar_one_or_none()
+    return version or 0
+
+def built_version(output_dir: str = None) -> Optional[int]:
+    """Версия таблицы вакансий, по которой собран сайт (None - сборки не было)"""
+    try:
+        with open(os.path.join(output_dir or STATIC_BUILD_DIR, BUILD_MANIFEST)) as f:
+            return json.load(f).get("version")
+    except (OSError, ValueError):
+        return None
+
+@contextmanager
+def _build_file_lock(output_dir: str):
+    """Блокировка сборки между процессами (без fcntl - только внутри процесса)"""
+    os.makedirs(output_dir, exist_ok=True)
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(os.path.join(output_dir, ".build.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def rebuild_if_changed(output_dir: str = None, engine=None) -> Optional[dict]:
+    """Пересобирает сайт, если вакансии менялись после последней сборки; иначе None"""
+    from app import database
+
+    output_dir = output_dir or STATIC_BUILD_DIR
+    with Session(engine or database.read_engine) as db:
+        version = _table_version(db)
+    if built_version(output_dir) == version:
+        return None
+    with _build_file_lock(output_dir):
+        if built_version(output_dir) == version:  # Собрал другой воркер, пока ждали
+            return None
+        return build_site(output_dir, engine)
+
+class StaticRebuilder:
+    """Фоновая задача сервера: проверка версии и пересборка в потоке"""
+
+    def __init__(self, interval: float = STATIC_REBUILD_DELAY, output_dir: str = None):
+        self.interval = interval
+        self.output_dir = output_dir
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            try:
+                stats = await asyncio.to_thread(rebuild_if_changed, self.output_dir)
+                if stats is not None:
+                    logger.info("Static site rebuilt: %s", stats)
+            except Exception:
+                logger.exception("Static rebuild failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+static_rebuilder = StaticRebuilder()
@@ -0,0 +1,250 @@
+import atexit
+import itertools
+import json
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from starlette.datastructures import MutableHeaders
+from app.metrics import Counter
+
+# ТРАССИРОВКА ЗАПРОСОВ
+# span("auth.token") отмечает фазу обработки запроса. TracingMiddleware
+# суммирует фазы по имени и отдаёт их в заголовке Server-Timing (видно в
+# DevTools браузера), время SQL берётся из статистики app.instrumentation.
+# Доля TRACE_SAMPLE_RATE запросов записывается целиком - с каждым SQL -
+# в TRACE_FILE в формате Chrome trace (chrome://tracing, ui.perfetto.dev).
+# Запись в файл идёт из фонового потока через ограниченную очередь.
+# Без Server-Timing и без выборки span() - это одно чтение contextvar.
+# Server-Timing показывает любому клиенту время БД и число SQL-запросов,
+# поэтому по умолчанию выключен: SERVER_TIMING=1 - для отладки и стендов.
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+TRACE_FILE = os.getenv("TRACE_FILE", os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "build", "traces.json"))
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "1000"))
+
+TRACES_DROPPED = Counter("traces_dropped_total", "Sampled traces dropped because the export queue was full")
+
+_trace_ids = itertools.count(1)
+
+class Trace:
+    """Фазы одного запроса: (имя, начало, длительность, подробности)"""
+
+    __slots__ = ("name", "sampled", "started", "started_ns", "spans", "args")
+
+    def __init__(self, name: str, sampled: bool = False):
+        self.name = name
+        self.sampled = sampled
+        self.started = time.perf_counter()
+        self.started_ns = time.time_ns()
+        self.spans = []
+        self.args = {}
+
+    def add(self, name: str, started: float, duration: float, detail: Optional[str] = None):
+        self.spans.append((name, started, duration, detail))
+
+    def totals(self) -> dict:
+        """Суммарная длительность по имени фазы"""
+        totals = {}
+        for name, _, duration, _ in self.spans:
+            totals[name] = totals.get(name, 0.0) + duration
+        return totals
+
+    def chrome_events(self, duration: float) -> list:
+        """События Chrome trace ("X" - завершённая фаза), время в микросекундах"""
+        pid, tid = os.getpid(), next(_trace_ids)
+        base = self.started_ns / 1000
+
+        def event(name, started, length, args=None):
+            entry = {"name": name, "ph": "X", "pid": pid, "tid": tid,
+                     "ts": round(base + (started - self.started) * 1e6, 3), "dur": round(length * 1e6, 3)}
+            if args:
+                entry["args"] = args
+            return entry
+
+        events = [event(self.name, self.started, duration, self.args)]
+        for name, started, length, detail in self.spans:
+            events.append(event(name, started, length, {"detail": detail} if detail else None))
+        return events
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+@contextmanager
+def span(name: str, detail: Optional[str] = None):
+    """Отмечает фазу текущего запроса; вне трассировки ничего не делает"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, started, time.perf_counter() - started, detail)
+
+@contextmanager
+def start_trace(name: str, sampled: Optional[bool] = None):
+    """
+    Корневая трассировка вне HTTP (скрипты, фоновые задачи):
+
+        with start_trace("build-static", sampled=True):
+            build_site()
+    """
+    trace = Trace(name, random.random() < TRACE_SAMPLE_RATE if sampled is None else sampled)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        if trace.sampled:
+            export(trace, time.perf_counter() - trace.started)
+
+# ЭКСПОРТ
+class TraceWriter:
+    """
+    Фоновая запись событий в файл. Формат - JSON-массив Chrome trace без
+    закрывающей скобки (его допускают chrome://tracing и Perfetto), поэтому
+    файл только дописывается.
+    """
+
+    def __init__(self, path: str, queue_size: int = TRACE_QUEUE_SIZE):
+        self.path = path
+        self.queue = queue.Queue(queue_size)
+        self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, events: list):
+        try:
+            self.queue.put_nowait(events)
+        except queue.Full:
+            TRACES_DROPPED.inc()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while True:  # Всё, что накопилось, - одной записью
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = "".join(json.dumps(event, ensure_ascii=False, default=str) + ",\n"
+                            for events in batch for event in events)
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    if f.tell() == 0:
+                        f.write("[\n")
+                    f.write(lines)
+            except OSError:
+                TRACES_DROPPED.inc(amount=len(batch))
+            for _ in batch:
+                self.queue.task_done()
+
+    def flush(self):
+        """Ждёт записи всех поставленных трасс (для тестов и остановки)"""
+        self.queue.join()
+
+_writer: Optional[TraceWriter] = None
+_writer_lock = threading.Lock()
+
+def get_writer() -> TraceWriter:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = TraceWriter(TRACE_FILE)
+                atexit.register(flush_traces)
+    return _writer
+
+def flush_traces():
+    """Дописывает поставленные в очередь трассы"""
+    writer = _writer
+    if writer is not None:
+        writer.flush()
+
+def _forget_writer():
+    # Поток записи не переживает fork: воркер запустит свой
+    global _writer
+    _writer = None
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_writer)
+
+def export(trace: Trace, duration: float):
+    get_writer().submit(trace.chrome_events(duration))
+
+# MIDDLEWARE
+def format_server_timing(totals: dict) -> str:
+    """Значение Server-Timing: "db;dur=1.2;desc="3 queries", app;dur=5.0" """
+    parts = []
+    for name, (duration, description) in totals.items():
+        part = f"{name};dur={duration * 1000:.3f}"
+        if description:
+            part += f';desc="{description}"'
+        parts.append(part)
+    return ", ".join(parts)
+
+class TracingMiddleware:
+    """
+    ASGI middleware: трассировка запроса и заголовок Server-Timing.
+    Должен стоять внутри SQLMetricsMiddleware - время SQL берётся из его
+    статистики запроса.
+    """
+
+    def __init__(self, app, sample_rate: float = TRACE_SAMPLE_RATE, server_timing: Optional[bool] = None):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.server_timing = server_timing  # None - по SERVER_TIMING
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        server_timing = SERVER_TIMING if self.server_timing is None else self.server_timing
+        if not sampled and not server_timing:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(f"{scope['method']} {scope['path']}", sampled)
+        token = _current_trace.set(trace)
+        status = None
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if server_timing:
+                    MutableHeaders(scope=message).append("Server-Timing", format_server_timing(self._totals(scope, trace)))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_trace.reset(token)
+            if sampled:
+                from app.logs import current_request_id
+                route = scope.get("route")
+                trace.args.update(route=getattr(route, "path", None), status=status,
+                                  request_id=current_request_id())
+                export(trace, time.perf_counter() - trace.started)
+
+    @staticmethod
+    def _totals(scope, trace: Trace) -> dict:
+        totals = {}
+        sql = scope.get("state", {}).get("sql")
+        if sql is not None and sql.query_count:
+            totals["db"] = (sql.total_time, f"{sql.query_count} queries")
+        for name, duration in trace.totals().items():
+            if name != "sql":  # Отдельные SQL уже вошли в db
+                totals[name] = (duration, None)
+        totals["app"] = (time.perf_counter() - trace.started, None)
+        return totals
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import os
+import time
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+from app.metrics import gauge_lines, register_collector
+
+logger = logging.getLogger(__name__)
+
+# ПРОГРЕВ ПРИ СТАРТЕ
+# Всё, за что иначе заплатили бы первые запросы после деплоя: соединения
+# пулов, конфигурация мапперов ORM, компиляция шаблонов, кеш вакансий,
+# загрузка Argon2. Пока прогрев не закончен, /health/ready отвечает 503.
+# WARMUP_IN_BACKGROUND=1 - сервер принимает запросы сразу, а прогрев идёт
+# фоном (балансировщик ждёт готовности по /health/ready).
+# Упавшие шаги (например, БД ещё не поднялась) повторяются фоном с паузой
+# от WARMUP_RETRY_DELAY, удваивающейся до WARMUP_RETRY_MAX_DELAY секунд,
+# не больше WARMUP_RETRIES раз; ошибка шага снимается при его успехе.
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") == "1"
+WARMUP_IN_BACKGROUND = os.getenv("WARMUP_IN_BACKGROUND", "0") == "1"
+WARMUP_RETRIES = int(os.getenv("WARMUP_RETRIES", "10"))
+WARMUP_RETRY_DELAY = float(os.getenv("WARMUP_RETRY_DELAY", "1"))
+WARMUP_RETRY_MAX_DELAY = float(os.getenv("WARMUP_RETRY_MAX_DELAY", "30"))
+
+class WarmupState:
+    """Результат прогрева: длительность шагов и ошибки"""
+
+    def __init__(self):
+        self.done = False
+        self.steps = {}   # шаг -> секунды
+        self.errors = {}  # шаг -> текст ошибки
+        self.retries = 0  # Повторы упавших шагов
+
+    @property
+    def ready(self) -> bool:
+        return self.done and not self.errors
+
+    def as_dict(self) -> dict:
+        return {
+            "done": self.done,
+            "steps": {name: round(seconds, 4) for name, seconds in self.steps.items()},
+            "errors": self.errors,
+            "retries": self.retries,
+        }
+
+warmup_state = WarmupState()
+
+async def _warm_pool(engine, connections: int):
+    """Открывает connections соединений одновременно и проверяет каждое SELECT 1"""
+    async def check():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(check() for _ in range(connections)))
+
+def _pool_size(engine) -> int:
+    size = getattr(engine.pool, "size", None)
+    return size() if callable(size) else 1
+
+async def warm_connections():
+    from app import database
+    engine = database.async_engine
+    read_engine = database.async_read_engine
+    await _warm_pool(engine, _pool_size(engine.sync_engine))
+    if read_engine is not engine:
+        await _warm_pool(read_engine, _pool_size(read_engine.sync_engine))
+
+async def warm_mappers():
+    from app import models  # noqa: F401 - Vacancy, AdminUser и остальные мапперы
+    configure_mappers()
+
+async def warm_templates():
+    from app.static_site import get_environment
+    env = get_environment()
+    for name in env.list_templates(filter_func=lambda name: name.endswith(".html")):
+        env.get_template(name)
+
+async def warm_vacancy_cache():
+    from app.routers.public import cached_list_body, vacancy_version
+    version, _ = await vacancy_version()
+    await cached_list_body(version, None, 20)  # Первая страница с параметрами по умолчанию
+
+async def warm_hashing():
+    # Загружает backend Argon2, поднимает потоки пула и готовит хеш
+    # для проверки несуществующих пользователей
+    from app.routers.admin import _get_dummy_hash
+    await _get_dummy_hash()
+
+async def warm_tokens():
+    from app.auth import _jwt, create_access_token
+    _jwt().decode(create_access_token({"sub": "warmup"}), options={"verify_signature": False})
+
+WARMUP_STEPS = (
+    ("connections", warm_connections),
+    ("mappers", warm_mappers),
+    ("templates", warm_templates),
+    ("vacancy_cache", warm_vacancy_cache),
+    ("hashing", warm_hashing),
+    ("tokens", warm_tokens),
+)
+
+async def _run_step(state: WarmupState, name: str, step) -> bool:
+    started = time.perf_counter()
+    try:
+        await step()
+    except Exception as e:
+        state.errors[name] = f"{type(e).__name__}: {e}"
+        logger.warning("Warm-up step %s failed: %s", name, e)
+        return False
+    finally:
+        state.steps[name] = time.perf_counter() - started
+    state.errors.pop(name, None)
+    return True
+
+async def warm_up(state: WarmupState = warmup_state) -> WarmupState:
+    """Выполняет шаги прогрева по очереди; ошибка шага не останавливает остальные"""
+    state.done = False
+    state.errors.clear()
+    state.retries = 0
+    for name, step in WARMUP_STEPS:
+        await _run_step(state, name, step)
+    state.done = True
+    return state
+
+async def retry_failed(state: WarmupState = warmup_state, retries: int = WARMUP_RETRIES,
+                       delay: float = WARMUP_RETRY_DELAY, max_delay: float = WARMUP_RETRY_MAX_DELAY) -> WarmupState:
+    """Повторяет упавшие шаги с растущей паузой, пока они не пройдут или не кончатся попытки"""
+    steps = dict(WARMUP_STEPS)
+    for _ in range(retries):
+        if not state.errors:
+            break
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, max_delay)
+        state.retries += 1
+        for name in list(state.errors):
+            await _run_step(state, name, steps[name])
+    if state.errors:
+        logger.error("Warm-up steps still failing after %d retries: %s", state.retries, ", ".join(state.errors))
+    else:
+        logger.info("Warm-up finished after %d retries", state.retries)
+    return state
+
+async def warm_up_and_retry(state: WarmupState = warmup_state) -> WarmupState:
+    await warm_up(state)
+    if state.errors:
+        await retry_failed(state)
+    return state
+
+@register_collector
+def _warmup_metrics():
+    yield from gauge_lines(
+        "app_warmup_step_seconds", "Startup warm-up duration by step",
+        {f'step="{name}"': seconds for name, seconds in warmup_state.steps.items()},
+    )
+    yield from gauge_lines("app_ready", "1 once startup warm-up has finished without errors",
+                           {"": int(warmup_state.ready)})
@@ -0,0 +1,10 @@
+"""
+Бенчмарки ARQ.
+
+    python -m benchmarks.http_load            # нагрузка на HTTP-эндпоинты
+    python benchmarks/bench_async_db.py       # sync и async доступ к БД
+    python benchmarks/bench_compression.py    # CPU сжатия против сэкономленных байт
+    python benchmarks/bench_sqlite_profile.py # профили PRAGMA SQLite
+    python benchmarks/bench_token_cache.py    # кеш проверенных JWT
+    python benchmarks/bench_tracing.py        # накладные расходы трассировки
+"""
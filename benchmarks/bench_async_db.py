@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк: синхронный и асинхронный доступ к БД при росте конкурентности.
+
+Сравниваются три варианта обработчика:
+  sync-inline   - синхронная сессия прямо в async def (блокирует event loop)
+  sync-thread   - синхронная сессия в threadpool (как def-обработчик FastAPI)
+  async         - AsyncSession на aiosqlite
+
+Кроме пропускной способности меряется задержка event loop (lag):
+насколько опаздывает фоновая задача, которая "тикает" каждые 5 мс.
+Именно она показывает, сможет ли воркер обслуживать другие запросы,
+пока идёт ввод-вывод SQLite.
+
+Запуск:
+    python benchmarks/bench_async_db.py --rows 2000 --levels 1 8 32 128
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+from app.database import Base
+from app.models import Vacancy
+
+TICK = 0.005
+
+
+def seed(url: str, rows: int):
+    """Заполняет БД тестовыми вакансиями"""
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add_all(
+            Vacancy(
+                title=f"Vacancy {i}",
+                description="Описание вакансии " * 20,
+                requirements="Python, SQL",
+                is_active=i % 3 != 0,
+            )
+            for i in range(rows)
+        )
+        db.commit()
+    engine.dispose()
+
+
+async def measure_lag(stop: asyncio.Event, samples: list):
+    """Фоновый "тикер": копит опоздания event loop"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(TICK)
+        samples.append(max(0.0, loop.time() - start - TICK))
+
+
+async def run_level(handler, concurrency: int, requests: int):
+    """Выполняет requests вызовов handler с заданной конкурентностью"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await handler()
+
+    stop = asyncio.Event()
+    lag = []
+    ticker = asyncio.create_task(measure_lag(stop, lag))
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+    max_lag = max(lag) * 1000 if lag else 0.0
+    return requests / elapsed, max_lag
+
+
+async def main_async(args):
+    tmpdir = tempfile.mkdtemp(prefix="arq-bench-")
+    path = os.path.join(tmpdir, "bench.db")
+    seed(f"sqlite:///{path}", args.rows)
+
+    sync_engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False},
+        pool_size=args.pool,
+    )
+    SyncSession = sessionmaker(bind=sync_engine)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", pool_size=args.pool)
+    AsyncSession = async_sessionmaker(bind=async_engine)
+
+    query = select(Vacancy).where(Vacancy.is_active.is_(True)).limit(args.limit)
+
+    def sync_query():
+        with SyncSession() as db:
+            return db.execute(query).scalars().all()
+
+    async def sync_inline():
+        sync_query()
+
+    async def sync_thread():
+        await run_in_threadpool(sync_query)
+
+    async def async_query():
+        async with AsyncSession() as db:
+            (await db.execute(query)).scalars().all()
+
+    handlers = [
+        ("sync-inline", sync_inline),
+        ("sync-thread", sync_thread),
+        ("async", async_query),
+    ]
+
+    print(f"rows={args.rows} limit={args.limit} requests/level={args.requests}")
+    print(f"{'mode':<12} {'conc':>5} {'req/s':>10} {'max lag ms':>11}")
+    for concurrency in args.levels:
+        for name, handler in handlers:
+            rps, lag = await run_level(handler, concurrency, args.requests)
+            print(f"{name:<12} {concurrency:>5} {rps:>10.0f} {lag:>11.1f}")
+
+    sync_engine.dispose()
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--pool", type=int, default=10)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 8, 32, 128])
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк: CPU на сжатие ответа против сэкономленных байт по уровням.
+
+Полезная нагрузка - типичные ответы: страница списка вакансий (JSON),
+карточка вакансии (JSON) и HTML-страница карточки, с длинным русским
+описанием. Сжатие потоковое, кусками по --chunk байт, как в
+CompressionMiddleware. brotli и zstd меряются, если установлены.
+
+Запуск:
+    python benchmarks/bench_compression.py --iterations 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.compression import available_encodings
+
+LEVELS = {
+    "gzip": (1, 4, 6, 9),
+    "br": (1, 4, 6, 11),
+    "zstd": (1, 3, 9, 19),
+}
+
+DESCRIPTION = (
+    "Мы ищем архитектора в команду проектирования жилых и общественных зданий. "
+    "Задачи: разработка концепций, рабочая документация, авторский надзор, "
+    "взаимодействие со смежными разделами и заказчиком. "
+)
+REQUIREMENTS = "Опыт от 3 лет, Revit, AutoCAD, знание СП и ГОСТ, портфолио. "
+
+def _vacancy(i: int) -> dict:
+    return {
+        "id": i,
+        "title": f"Архитектор {i}",
+        "description": DESCRIPTION * 6,
+        "requirements": REQUIREMENTS * 3,
+        "is_active": True,
+        "created_at": "2026-01-15T10:00:00",
+        "updated_at": "2026-01-15T10:00:00",
+    }
+
+def payloads() -> dict:
+    detail = _vacancy(1)
+    html = (
+        "<!DOCTYPE html><html lang=\"ru\"><head><meta charset=\"utf-8\"><title>"
+        f"{detail['title']}</title></head><body><article class=\"bg-white rounded shadow p-6\">"
+        f"<h1>{detail['title']}</h1><div>{detail['description']}</div>"
+        f"<h2>Требования</h2><div>{detail['requirements']}</div></article></body></html>"
+    )
+    return {
+        "list (20)": json.dumps({"items": [_vacancy(i) for i in range(20)], "next_cursor": "eyJhIjoxfQ"},
+                                ensure_ascii=False).encode(),
+        "detail json": json.dumps(detail, ensure_ascii=False).encode(),
+        "detail html": html.encode(),
+    }
+
+def compress_streaming(compressor_class, level: int, body: bytes, chunk: int) -> int:
+    compressor = compressor_class(level)
+    size = 0
+    for offset in range(0, len(body), chunk):
+        part = body[offset:offset + chunk]
+        if offset + chunk < len(body):
+            size += len(compressor.compress(part, flush=True))
+        else:
+            size += len(compressor.finish(part))
+    return size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--chunk", type=int, default=64 * 1024, help="Streaming chunk size, bytes")
+    args = parser.parse_args()
+
+    encodings = available_encodings()
+    missing = [name for name in LEVELS if name not in encodings]
+    if missing:
+        print(f"not installed, skipped: {', '.join(missing)}")
+    print(f"{'payload':<12} {'enc':<5} {'lvl':>3} {'bytes':>8} {'saved':>7} {'cpu us':>8} {'MB/s':>7} {'KB saved/ms':>12}")
+    for name, body in payloads().items():
+        print(f"{name:<12} {'-':<5} {'-':>3} {len(body):>8}")
+        for encoding, compressor_class in encodings.items():
+            for level in LEVELS[encoding]:
+                size = compress_streaming(compressor_class, level, body, args.chunk)
+                started = time.process_time()
+                for _ in range(args.iterations):
+                    compress_streaming(compressor_class, level, body, args.chunk)
+                cpu = (time.process_time() - started) / args.iterations
+                saved = len(body) - size
+                print(f"{'':<12} {encoding:<5} {level:>3} {size:>8} {saved / len(body):>7.1%} "
+                      f"{cpu * 1e6:>8.0f} {len(body) / cpu / 2**20:>7.0f} {saved / 1024 / (cpu * 1000):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк: пропускная способность чтения во время непрерывной записи.
+
+Один поток-писатель без остановки добавляет и обновляет вакансии
+(каждая операция - отдельная транзакция), несколько потоков-читателей
+листают активные вакансии. Сравниваются профили SQLITE_PROFILE
+(off / default / production) с разделёнными пулами чтения и записи.
+
+Запуск:
+    python benchmarks/bench_sqlite_profile.py --seconds 5 --readers 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, make_engine
+from app.models import Vacancy
+
+
+def run_profile(profile: str, args) -> dict:
+    """Прогон одного профиля на свежей БД"""
+    path = os.path.join(tempfile.mkdtemp(prefix="arq-bench-"), "bench.db")
+    url = f"sqlite:///{path}"
+    writer = make_engine(url, profile=profile)
+    reader = make_engine(url, readonly=True, profile=profile)
+    Base.metadata.create_all(bind=writer)
+
+    WriteSession = sessionmaker(bind=writer)
+    ReadSession = sessionmaker(bind=reader)
+    with WriteSession() as db:
+        db.add_all(
+            Vacancy(title=f"Vacancy {i}", description="Описание " * 50, is_active=True)
+            for i in range(args.rows)
+        )
+        db.commit()
+
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0, "read_errors": 0, "write_errors": 0}
+    lock = threading.Lock()
+    query = (
+        select(Vacancy.id, Vacancy.title)
+        .where(Vacancy.is_active.is_(True))
+        .order_by(Vacancy.created_at.desc(), Vacancy.id.desc())
+        .limit(20)
+    )
+
+    def count(key):
+        with lock:
+            counts[key] += 1
+
+    def write_loop():
+        i = 0
+        while not stop.is_set():
+            try:
+                with WriteSession() as db:
+                    if i % 2:
+                        db.execute(update(Vacancy).where(Vacancy.id == i % args.rows + 1)
+                                   .values(title=f"Updated {i}"))
+                    else:
+                        db.add(Vacancy(title=f"New {i}", description="Описание " * 50))
+                    db.commit()
+                count("writes")
+            except OperationalError:
+                count("write_errors")
+            i += 1
+
+    def read_loop():
+        while not stop.is_set():
+            try:
+                with ReadSession() as db:
+                    db.execute(query).all()
+                count("reads")
+            except OperationalError:
+                count("read_errors")
+
+    threads = [threading.Thread(target=write_loop)]
+    threads += [threading.Thread(target=read_loop) for _ in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    writer.dispose()
+    reader.dispose()
+    return {key: value / args.seconds if not key.endswith("errors") else value
+            for key, value in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--profiles", nargs="+", default=["off", "default", "production"])
+    args = parser.parse_args()
+
+    print(f"readers={args.readers} rows={args.rows} seconds={args.seconds}")
+    print(f"{'profile':<12} {'reads/s':>10} {'writes/s':>10} {'read err':>9} {'write err':>10}")
+    for profile in args.profiles:
+        result = run_profile(profile, args)
+        print(f"{profile:<12} {result['reads']:>10.0f} {result['writes']:>10.0f} "
+              f"{result['read_errors']:>9} {result['write_errors']:>10}")
+
+
+if __name__ == "__main__":
+    main()
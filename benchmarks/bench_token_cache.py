@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк: стоимость проверки JWT на запрос без кеша и с кешем.
+
+"без кеша" - каждый вызов делает jwt.decode (HMAC + разбор claims),
+"с кешем"  - verify_token с прогретым кешем (SHA-256 токена + поиск в LRU).
+
+Запуск:
+    python benchmarks/bench_token_cache.py --calls 100000
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.auth import _decode_token, create_access_token, token_cache, verify_token
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=100000)
+    args = parser.parse_args()
+
+    token = create_access_token({"sub": "admin", "role": "admin"})
+    # Прогреваем кеш; токены принимаются только у существующих администраторов
+    if verify_token(token) is None:
+        sys.exit("No admin user 'admin' in the database: run python manage.py initdb")
+
+    uncached = timeit.timeit(lambda: _decode_token(token), number=args.calls)
+    cached = timeit.timeit(lambda: verify_token(token), number=args.calls)
+
+    per_call = lambda total: total / args.calls * 1e6
+    print(f"calls={args.calls}")
+    print(f"{'jwt.decode (no cache)':<24} {per_call(uncached):>8.2f} us/call")
+    print(f"{'verify_token (cached)':<24} {per_call(cached):>8.2f} us/call")
+    print(f"speedup: {uncached / cached:.1f}x")
+    print(f"cache stats: {token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк: накладные расходы трассировки на один запрос.
+
+ASGI-приложение с тремя span() прогоняется напрямую (без сети и
+TestClient) без middleware, с TracingMiddleware без выборки и без
+Server-Timing, только с Server-Timing и с выборкой каждого запроса
+(запись трасс во временный файл).
+
+Запуск:
+    python benchmarks/bench_tracing.py --iterations 20000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import tracing
+from app.tracing import TraceWriter, TracingMiddleware, span
+
+async def inner_app(scope, receive, send):
+    with span("auth.token"):
+        pass
+    with span("serialize"):
+        body = b'{"ok": true}'
+    with span("render"):
+        pass
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": body})
+
+async def run(app, iterations: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/bench", "headers": [], "state": {}}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await app(scope, receive, send)
+    return (time.perf_counter() - started) / iterations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tracing._writer = TraceWriter(os.path.join(tmp, "traces.json"), queue_size=args.iterations)
+        variants = {
+            "no middleware": inner_app,
+            "tracing off": TracingMiddleware(inner_app, sample_rate=0, server_timing=False),
+            "server-timing": TracingMiddleware(inner_app, sample_rate=0, server_timing=True),
+            "sampled 100%": TracingMiddleware(inner_app, sample_rate=1.0, server_timing=True),
+        }
+        baseline = None
+        print(f"{'variant':<15} {'us/request':>11} {'overhead us':>12}")
+        for name, app in variants.items():
+            per_request = asyncio.run(run(app, args.iterations))
+            baseline = per_request if baseline is None else baseline
+            print(f"{name:<15} {per_request * 1e6:>11.2f} {(per_request - baseline) * 1e6:>12.2f}")
+        tracing._writer.flush()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный бенчмарк HTTP-эндпоинтов: пропускная способность и p50/p95/p99.
+
+По умолчанию приложение app.main:app запускается в этом же процессе
+(httpx + ASGITransport) на временной БД с тестовыми вакансиями.
+С --url нагрузка идёт на уже запущенный сервер (uvicorn / manage.py runserver).
+
+    python -m benchmarks.http_load --concurrency 32 --requests 2000
+    python -m benchmarks.http_load --save baseline.json
+    python -m benchmarks.http_load --compare baseline.json --threshold 0.15
+
+В режиме --compare процесс завершается с кодом 1, если какой-то эндпоинт
+стал медленнее (p95) или потерял пропускную способность больше чем на threshold.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+ENDPOINTS = {
+    "home": "/",
+    "health": "/health",
+    "vacancies": "/vacancies?limit=20",
+    "auth": "/auth/me",
+}
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Перцентиль по методу ближайшего ранга"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: list, elapsed: float, errors: int) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def drive(client: httpx.AsyncClient, path: str, requests: int, concurrency: int, headers: dict) -> dict:
+    """Выполняет requests запросов к path с заданной конкурентностью"""
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def prepare_in_process(rows: int):
+    """Временная БД с вакансиями и ASGI-транспорт приложения"""
+    path = os.path.join(tempfile.mkdtemp(prefix="arq-bench-"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+
+    from app.database import Base, SessionLocal, engine
+    from app.models import AdminUser, Vacancy
+    from app.main import app
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.add(AdminUser(username="bench", hashed_password="-"))  # Владелец токена для auth
+        db.add_all(
+            Vacancy(title=f"Vacancy {i}", description="Описание вакансии " * 30,
+                    requirements="Python, SQL", is_active=i % 4 != 0)
+            for i in range(rows)
+        )
+        db.commit()
+    return httpx.ASGITransport(app=app), "http://arq.bench"
+
+
+async def run(args) -> dict:
+    if args.url:
+        transport, base_url = None, args.url
+        token = args.token
+    else:
+        transport, base_url = prepare_in_process(args.rows)
+        from app.auth import create_access_token
+        token = create_access_token({"sub": "bench"})
+
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits) as client:
+        for name in args.endpoints:
+            headers = {"Authorization": f"Bearer {token}"} if name == "auth" and token else {}
+            # Прогрев: соединения, кеши, первая конфигурация ORM
+            await drive(client, ENDPOINTS[name], min(50, args.requests), args.concurrency, headers)
+            results[name] = await drive(client, ENDPOINTS[name], args.requests, args.concurrency, headers)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Список регрессий относительно сохранённого baseline"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms")
+        if current["rps"] < previous["rps"] * (1 - threshold):
+            regressions.append(f"{name}: rps {previous['rps']:.0f} -> {current['rps']:.0f}")
+        if current["errors"] > previous["errors"]:
+            regressions.append(f"{name}: errors {previous['errors']} -> {current['errors']}")
+    return regressions
+
+
+def print_table(results: dict):
+    print(f"{'endpoint':<10} {'req':>7} {'err':>5} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, r in results.items():
+        print(f"{name:<10} {r['requests']:>7} {r['errors']:>5} {r['rps']:>9.0f} "
+              f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="Base URL of a running server (default: in-process app)")
+    parser.add_argument("--token", help="Bearer token for the auth endpoint with --url")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per endpoint")
+    parser.add_argument("--rows", type=int, default=1000, help="Vacancies to seed in-process")
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument("--save", metavar="FILE", help="Write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="Fail if results regress against a baseline")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed relative regression")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    print(f"concurrency={args.concurrency} requests/endpoint={args.requests} "
+          f"target={args.url or 'in-process'}")
+    print_table(results)
+
+    if args.save:
+        payload = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "results": results,
+        }
+        with open(args.save, "w") as f:
+            json.dump(payload, f, indent=2)
+        print(f"Baseline saved: {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"Regressions over {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"No regressions over {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
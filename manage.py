@@ -10,7 +10,7 @@ sys.path.insert(0, prj_path)
 def main():
     if len(sys.argv) < 2:
         print("Usage: python manage.py <command>")
-        print("Commands: test, admin, runserver, initdb")
+        print("Commands: test, admin, runserver, serve, initdb, migrate, reindex, import-vacancies, export-vacancies, importtime, calibrate-hash, build-static, collectstatic")
         return
     
     command = sys.argv[1]
@@ -23,10 +23,49 @@ def main():
         admin_main()
     elif command == "runserver":
         import uvicorn
-        uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+        from app.logs import setup_logging
+        setup_logging()  # Логи uvicorn - через очередь app.logs, как у приложения
+        uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True, log_config=None)
+    elif command == "serve":
+        from scripts.serve import main as serve_main
+        serve_main(sys.argv[2:])
     elif command == "initdb":
         from scripts.init_db import create_test_data
         create_test_data()
+    elif command == "migrate":
+        from scripts.init_db import migrate_database
+        stats = migrate_database()
+        if stats["token_revocation_column"]:
+            print("Column admin_users.tokens_valid_after added")
+        if stats["refresh_token_replaced_column"]:
+            print("Column refresh_tokens.replaced_at added")
+        print(f"Excerpts filled: {stats['excerpts']} vacancies")
+        print(f"Change feed timestamps filled: {stats['updated_at']} vacancies")
+        print(f"Indexes created: {', '.join(stats['indexes']) or 'none'}")
+    elif command == "reindex":
+        from app.database import engine
+        from app.crud import backfill_excerpts, rebuild_search_index
+        count = rebuild_search_index(engine)
+        print(f"Search index rebuilt: {count} vacancies")
+        print(f"Excerpts filled: {backfill_excerpts(engine)} vacancies")
+    elif command == "import-vacancies":
+        from scripts.vacancy_io import main_import
+        main_import(sys.argv[2:])
+    elif command == "export-vacancies":
+        from scripts.vacancy_io import main_export
+        main_export(sys.argv[2:])
+    elif command == "importtime":
+        from scripts.importtime import main as importtime_main
+        sys.exit(importtime_main(sys.argv[2:]))
+    elif command == "calibrate-hash":
+        from scripts.calibrate_hash import main as calibrate_main
+        calibrate_main(sys.argv[2:])
+    elif command == "build-static":
+        from scripts.build_static import main as build_static_main
+        build_static_main(sys.argv[2:])
+    elif command == "collectstatic":
+        from scripts.collectstatic import main as collectstatic_main
+        collectstatic_main(sys.argv[2:])
     else:
         print(f"Unknown command: {command}")
 
@@ -6,7 +6,9 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.database import SessionLocal
 from app.models import AdminUser
-from app.auth import get_password_hash, verify_password
+from app.queries import ADMIN_LIST
+from app.auth import get_password_hash, verify_password, revoke_user_tokens
+from app.crud import revoke_user_refresh_tokens
 from getpass import getpass
 
 def display_menu():
@@ -24,7 +26,7 @@ def display_menu():
 
 def list_admins(db):
     """Выводит список всех администраторов"""
-    admins = db.query(AdminUser).order_by(AdminUser.created_at).all()
+    admins = db.execute(ADMIN_LIST).all()  # Без хешей паролей
     
     if not admins:
         print("📭 No administrators in database")
@@ -99,7 +101,7 @@ def delete_admin(db):
             print(f"❌ Number must be between 1 and {len(admins)}")
             return
         
-        admin = admins[idx]
+        admin = db.get(AdminUser, admins[idx].id)  # Полная запись только для выбранного
         
         # Подтверждение
         confirm = input(f"Are you sure you want to delete '{admin.username}' (ID: {admin.id})? [y/N]: ").strip().lower()
@@ -110,7 +112,8 @@ def delete_admin(db):
         # Удаляем
         username = admin.username
         db.delete(admin)
-        db.commit()
+        db.commit()  # Токены удалённого администратора сервер не принимает (нет записи в БД)
+        revoke_user_refresh_tokens(db, username)
         
         print(f"✅ Administrator '{username}' deleted")
         
@@ -137,7 +140,7 @@ def change_password(db):
             print(f"❌ Number must be between 1 and {len(admins)}")
             return
         
-        admin = admins[idx]
+        admin = db.get(AdminUser, admins[idx].id)  # Полная запись только для выбранного
         
         print(f"\n✏️  Change password for '{admin.username}'")
         print("-" * 30)
@@ -160,7 +163,11 @@ def change_password(db):
         
         # Обновляем пароль
         admin.hashed_password = get_password_hash(new_password)
+        # Старые токены: сервер перестанет их принимать не позже чем через
+        # TOKEN_CACHE_TTL секунд (этот процесс - не сервер, его кеш ни при чём)
+        admin.tokens_valid_after = revoke_user_tokens(admin.username)
         db.commit()
+        revoke_user_refresh_tokens(db, admin.username)
         
         print(f"✅ Password for '{admin.username}' changed successfully!")
         
@@ -187,7 +194,7 @@ def check_password(db):
             print(f"❌ Number must be between 1 and {len(admins)}")
             return
         
-        admin = admins[idx]
+        admin = db.get(AdminUser, admins[idx].id)  # Полная запись только для выбранного
         
         print(f"\n🔍 Verify password for '{admin.username}'")
         print("-" * 30)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Сборка статических HTML-страниц сайта для отдачи через nginx.
+
+Повторный запуск перерисовывает только страницы, у которых изменились
+вакансии или шаблоны (хеши хранятся в .build-manifest.json в каталоге сборки).
+
+    python manage.py build-static
+    python manage.py build-static --output /var/www/arq --force
+    TRACE_SAMPLE_RATE=1 python manage.py build-static   # время рендера страниц в TRACE_FILE
+
+Страницы собираются под /jobs/ и не пересекаются с путями JSON API.
+Пример для nginx (всё остальное - в приложение):
+
+    location /jobs/ {
+        root /var/www/arq;
+        try_files $uri $uri/index.html =404;
+    }
+    location / {
+        proxy_pass http://arq_app;
+    }
+"""
+import argparse
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.static_site import STATIC_BUILD_DIR, build_site
+from app.tracing import start_trace
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manage.py build-static")
+    parser.add_argument("--output", default=STATIC_BUILD_DIR, help="Output directory (STATIC_BUILD_DIR)")
+    parser.add_argument("--force", action="store_true", help="Re-render every page")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    with start_trace("build-static"):
+        stats = build_site(args.output, force=args.force)
+    print(f"Static site built in {args.output}: {stats['rendered']} rendered, "
+          f"{stats['unchanged']} unchanged, {stats['removed']} removed "
+          f"({time.perf_counter() - started:.2f} s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Подбор параметров Argon2 под конкретную машину.
+
+Память на один хеш ограничивается так, чтобы HASH_WORKERS одновременных
+проверок укладывались в --memory-budget-mb. Затем time_cost растёт, пока
+проверка пароля не займёт --target-ms; если даже time_cost=1 медленнее
+цели, уменьшается память. Найденные параметры записываются в .env
+(ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM); хеши со старыми
+параметрами пересчитываются при следующем входе администратора.
+
+    python manage.py calibrate-hash --target-ms 250 --memory-budget-mb 512
+    python manage.py calibrate-hash --dry-run
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.auth import HASH_WORKERS, make_pwd_context
+
+MIN_MEMORY_KIB = 8 * 1024          # Ниже 8MB Argon2 теряет смысл
+MAX_MEMORY_KIB = 1024 * 1024       # Больше 1GB на хеш не берём
+MAX_TIME_COST = 20
+
+def total_memory_mb() -> float:
+    """Объём RAM машины (Linux/macOS), None если неизвестен"""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 2**20
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def measure_verify_ms(time_cost: int, memory_kib: int, parallelism: int, runs: int) -> float:
+    """Медиана времени проверки пароля с заданными параметрами, мс"""
+    context = make_pwd_context(time_cost, memory_kib, parallelism)
+    hashed = context.hash("calibration-password")
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        context.verify("calibration-password", hashed)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def _floor_power_of_two(value: int) -> int:
+    return 1 << (max(1, value).bit_length() - 1)
+
+def calibrate(target_ms: float, memory_budget_mb: float, workers: int, parallelism: int, runs: int = 3) -> dict:
+    """Параметры, при которых проверка занимает около target_ms и не выходит за бюджет памяти"""
+    memory_kib = _floor_power_of_two(int(memory_budget_mb * 1024 / workers))
+    memory_kib = max(MIN_MEMORY_KIB, min(MAX_MEMORY_KIB, memory_kib))
+
+    # Самые дешёвые параметры при выбранной памяти всё ещё медленнее цели -
+    # уменьшаем память (время проверки почти линейно зависит от неё)
+    latency = measure_verify_ms(1, memory_kib, parallelism, runs)
+    while latency > target_ms and memory_kib > MIN_MEMORY_KIB:
+        memory_kib //= 2
+        latency = measure_verify_ms(1, memory_kib, parallelism, runs)
+
+    time_cost = 1
+    while time_cost < MAX_TIME_COST:
+        next_latency = measure_verify_ms(time_cost + 1, memory_kib, parallelism, runs)
+        if next_latency > target_ms:
+            break
+        time_cost, latency = time_cost + 1, next_latency
+
+    return {
+        "time_cost": time_cost,
+        "memory_cost": memory_kib,
+        "parallelism": parallelism,
+        "verify_ms": latency,
+        "peak_memory_mb": memory_kib * workers / 1024,
+    }
+
+def save_to_env(params: dict, env_path: str):
+    from dotenv import set_key
+    set_key(env_path, "ARGON2_TIME_COST", str(params["time_cost"]), quote_mode="never")
+    set_key(env_path, "ARGON2_MEMORY_COST", str(params["memory_cost"]), quote_mode="never")
+    set_key(env_path, "ARGON2_PARALLELISM", str(params["parallelism"]), quote_mode="never")
+
+def main(argv=None):
+    ram_mb = total_memory_mb()
+    parser = argparse.ArgumentParser(prog="manage.py calibrate-hash")
+    parser.add_argument("--target-ms", type=float, default=250, help="Target verify latency")
+    parser.add_argument("--memory-budget-mb", type=float,
+                        default=ram_mb / 8 if ram_mb else 512,
+                        help="Memory for all concurrent hashes (default: 1/8 of RAM)")
+    parser.add_argument("--workers", type=int, default=HASH_WORKERS,
+                        help="Concurrent hashes (HASH_WORKERS)")
+    parser.add_argument("--parallelism", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--env-file", default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env"))
+    parser.add_argument("--dry-run", action="store_true", help="Print parameters without saving")
+    args = parser.parse_args(argv)
+
+    print(f"Calibrating Argon2: target {args.target_ms:.0f} ms, "
+          f"memory budget {args.memory_budget_mb:.0f} MB for {args.workers} workers...")
+    params = calibrate(args.target_ms, args.memory_budget_mb, args.workers, args.parallelism)
+    print(f"  time_cost   = {params['time_cost']}")
+    print(f"  memory_cost = {params['memory_cost']} KiB ({params['memory_cost'] // 1024} MB)")
+    print(f"  parallelism = {params['parallelism']}")
+    print(f"  verify      = {params['verify_ms']:.1f} ms")
+    print(f"  peak memory = {params['peak_memory_mb']:.0f} MB with {args.workers} concurrent hashes")
+
+    if args.dry_run:
+        return
+    save_to_env(params, args.env_file)
+    print(f"Saved to {args.env_file}. Restart the server to apply; "
+          "existing password hashes are upgraded on next login.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Сборка статических файлов: имена с хешем содержимого, сжатые заранее
+.gz и .br (если установлен brotli) и manifest.json для шаблонов.
+
+    python manage.py collectstatic
+    python manage.py collectstatic --output /var/www/arq/static
+
+После сборки статики пересоберите страницы (manage.py build-static),
+чтобы они ссылались на новые имена файлов.
+"""
+import argparse
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.assets import STATIC_ROOT, STATIC_SOURCE_DIR, _brotli, collect_static
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manage.py collectstatic")
+    parser.add_argument("--source", default=STATIC_SOURCE_DIR)
+    parser.add_argument("--output", default=STATIC_ROOT, help="Output directory (STATIC_ROOT)")
+    args = parser.parse_args(argv)
+
+    if _brotli() is None:
+        print("brotli is not installed: writing .gz only (pip install brotli)")
+    stats = collect_static(args.source, args.output)
+    print(f"Static files collected in {args.output}: {stats['copied']} copied, "
+          f"{stats['unchanged']} unchanged, {stats['compressed']} compressed variants")
+
+if __name__ == "__main__":
+    main()
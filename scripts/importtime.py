@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Стоимость импорта модулей приложения и бюджет холодного старта.
+
+Каждый модуль импортируется в отдельном чистом интерпретаторе
+(python -X importtime), поэтому замер не зависит от уже загруженных
+пакетов. Команда завершается с кодом 1, если суммарное время импорта
+модуля превышает бюджет.
+
+    python manage.py importtime
+    python manage.py importtime app.main --budget-ms 800 --top 15
+
+Бюджеты по умолчанию задаются в IMPORT_BUDGETS_MS, общий бюджет для всех
+модулей можно задать переменной окружения IMPORT_BUDGET_MS.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Бюджеты холодного импорта, мс
+IMPORT_BUDGETS_MS = {
+    "app.auth": 100,
+    "app.database": 600,
+    "app.models": 700,
+    "app.main": 1500,
+}
+
+def measure(module: str) -> list:
+    """
+    Импортирует module в новом процессе, возвращает записи
+    (self_us, cumulative_us, depth, name) в порядке вывода importtime.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return entries
+
+def report(module: str, entries: list, top: int) -> float:
+    """Печатает самые дорогие импорты; возвращает общее время модуля в мс"""
+    # importtime пишет модуль после всех его зависимостей; всё, что выше
+    # предыдущей записи верхнего уровня (site и т.п.), - старт интерпретатора
+    end = max(i for i, entry in enumerate(entries) if entry[3] == module and entry[2] == 0)
+    start = max((i for i in range(end) if entries[i][2] == 0), default=-1) + 1
+    total_us = entries[end][1]
+    print(f"\n{module}: {total_us / 1000:.1f} ms")
+    # Прямые зависимости модуля - то, что реально можно сделать ленивым
+    top_level = [(cum, name) for _, cum, depth, name in entries[start:end] if depth == 1]
+    for cum, name in sorted(top_level, reverse=True)[:top]:
+        print(f"  {cum / 1000:>8.1f} ms  {name}")
+    return total_us / 1000
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="manage.py importtime")
+    parser.add_argument("modules", nargs="*", default=list(IMPORT_BUDGETS_MS))
+    parser.add_argument("--budget-ms", type=float, default=os.getenv("IMPORT_BUDGET_MS"),
+                        help="Budget for every module (overrides per-module defaults)")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    failed = []
+    for module in args.modules:
+        total_ms = report(module, measure(module), args.top)
+        budget = float(args.budget_ms) if args.budget_ms else IMPORT_BUDGETS_MS.get(module)
+        if budget is not None and total_ms > budget:
+            failed.append(f"{module}: {total_ms:.1f} ms > budget {budget:.0f} ms")
+
+    if failed:
+        print("\nCold-start budget exceeded:")
+        for line in failed:
+            print(f"  {line}")
+        return 1
+    print("\nAll modules within cold-start budget")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
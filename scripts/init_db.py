@@ -22,6 +22,24 @@ def init_database():
     tables = inspector.get_table_names()
     print(f"Tables: {tables}")
 
+def migrate_database(engine=engine) -> dict:
+    """
+    Доводит БД, созданную старой версией, до текущей схемы: новые таблицы,
+    колонки и индексы, заполнение новых колонок. Повторный запуск ничего не меняет.
+    """
+    from app.crud import (
+        add_refresh_token_replaced_column, add_token_revocation_column, backfill_excerpts,
+        backfill_updated_at, create_vacancy_indexes,
+    )
+    Base.metadata.create_all(bind=engine)
+    return {
+        "token_revocation_column": add_token_revocation_column(engine),
+        "refresh_token_replaced_column": add_refresh_token_replaced_column(engine),
+        "excerpts": backfill_excerpts(engine),
+        "updated_at": backfill_updated_at(engine),
+        "indexes": create_vacancy_indexes(engine),
+    }
+
 def create_test_data():
     """Создаёт тестовые данные для разработки"""
     from app.database import SessionLocal
@@ -66,9 +84,11 @@ def create_test_data():
             )
         ]
         
+        # Один запрос на все заголовки вместо запроса на каждую вакансию
+        titles = [vacancy.title for vacancy in vacancies]
+        existing = {title for (title,) in db.query(Vacancy.title).filter(Vacancy.title.in_(titles))}
         for vacancy in vacancies:
-            exists = db.query(Vacancy).filter_by(title=vacancy.title).first()
-            if not exists:
+            if vacancy.title not in existing:
                 db.add(vacancy)
         
         db.commit()
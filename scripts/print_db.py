@@ -3,20 +3,19 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.database import SessionLocal
-from app.models import Vacancy, AdminUser
+from app.queries import ADMIN_LIST, ALL_VACANCY_SUMMARIES
 
 db = SessionLocal()
 
+# Только нужные колонки: без хешей паролей и полного текста вакансий
 print('👥 Admins:')
-admins = db.query(AdminUser).all()
-for admin in admins:
+for admin in db.execute(ADMIN_LIST):
     print(f'  - {admin.username} (ID: {admin.id})')
 
 print('\n💼 Vacancies:')
-vacancies = db.query(Vacancy).all()
-for vac in vacancies:
+for vac in db.execute(ALL_VACANCY_SUMMARIES).yield_per(500):
     status = 'Active' if vac.is_active else 'NoActive'
     print(f'  - {vac.title} ({status})')
-    print(f'    Description: {vac.description[:50]}...')
+    print(f'    Description: {(vac.excerpt or "")[:50]}...')
 
 db.close()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Продакшен-запуск: несколько воркеров uvicorn на одном порту.
+
+    python manage.py serve
+    python manage.py serve --workers 8 --max-requests 10000 --max-memory-mb 512
+
+Плавный перезапуск воркеров без потери запросов: kill -HUP <pid мастера>.
+Для разработки по-прежнему python manage.py runserver (один процесс, reload).
+С несколькими воркерами лимиты входа стоит держать в общей БД
+(LOGIN_RATE_LIMIT_DB), иначе у каждого воркера свои корзины.
+"""
+import argparse
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manage.py serve")
+    parser.add_argument("--host", default=server.SERVE_HOST)
+    parser.add_argument("--port", type=int, default=server.SERVE_PORT)
+    parser.add_argument("--workers", type=int, default=server.SERVE_WORKERS,
+                        help=f"Worker processes (default: CPU count, {server.default_workers()} here)")
+    parser.add_argument("--no-preload", dest="preload", action="store_false", default=server.SERVE_PRELOAD,
+                        help="Import the app in each worker instead of the master")
+    parser.add_argument("--max-requests", type=int, default=server.SERVE_MAX_REQUESTS,
+                        help="Recycle a worker after this many requests (0 - never)")
+    parser.add_argument("--max-requests-jitter", type=int, default=server.SERVE_MAX_REQUESTS_JITTER)
+    parser.add_argument("--max-memory-mb", type=int, default=server.SERVE_MAX_MEMORY_MB,
+                        help="Recycle a worker whose RSS exceeds this (0 - never)")
+    parser.add_argument("--graceful-timeout", type=int, default=server.SERVE_GRACEFUL_TIMEOUT,
+                        help="Seconds a stopping worker may spend finishing requests")
+    args = parser.parse_args(argv)
+
+    server.Arbiter(
+        host=args.host, port=args.port, workers=args.workers, preload=args.preload,
+        max_requests=args.max_requests, max_requests_jitter=args.max_requests_jitter,
+        max_memory_mb=args.max_memory_mb, graceful_timeout=args.graceful_timeout,
+    ).run()
+
+if __name__ == "__main__":
+    main()
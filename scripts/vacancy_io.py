@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Потоковый импорт и экспорт вакансий (JSONL или CSV).
+
+Память постоянна независимо от размера файла: импорт читает и пишет
+пачками по --chunk-size строк, экспорт выбирает строки через yield_per.
+Импорт - upsert по title: на пачку один SELECT существующих заголовков,
+затем один executemany INSERT и один executemany UPDATE.
+
+    python manage.py import-vacancies vacancies.jsonl
+    python manage.py export-vacancies - --format csv > vacancies.csv
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from contextlib import nullcontext
+from datetime import datetime
+from itertools import islice
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import bindparam, insert, select, update
+
+FIELDS = ["title", "description", "requirements", "is_active", "created_at", "updated_at"]
+IMPORT_FIELDS = ["title", "description", "requirements", "is_active"]
+WRITE_FIELDS = IMPORT_FIELDS + ["excerpt"]  # excerpt вычисляется из description
+
+def _detect_format(path: str, fmt: str = None) -> str:
+    if fmt:
+        return fmt
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+def _parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    if value is None or value == "":
+        return True
+    return str(value).strip().lower() in ("1", "true", "yes", "y")
+
+def read_rows(stream, fmt: str):
+    """Построчно читает записи вакансий из потока"""
+    if fmt == "csv":
+        rows = csv.DictReader(stream)
+    else:
+        rows = (json.loads(line) for line in stream if line.strip())
+    for row in rows:
+        if not row.get("title") or not row.get("description"):
+            raise ValueError(f"Vacancy requires title and description: {row}")
+        yield {
+            "title": row["title"],
+            "description": row["description"],
+            "requirements": row.get("requirements") or None,
+            "is_active": _parse_bool(row.get("is_active")),
+        }
+
+def _chunks(rows, size: int):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+def import_vacancies(stream, fmt: str = "jsonl", chunk_size: int = 5000, engine=None) -> dict:
+    """
+    Импортирует вакансии из потока с upsert по title.
+    Каждая пачка - отдельная транзакция. Возвращает счётчики inserted/updated.
+    """
+    from app.cache import vacancy_cache
+    from app.crud import bump_table_version
+    from app.database import engine as default_engine
+    from app.models import Vacancy, make_excerpt
+
+    engine = engine or default_engine
+    table = Vacancy.__table__
+    update_stmt = (
+        update(table)
+        .where(table.c.id == bindparam("_id"))
+        .values({name: bindparam(name) for name in WRITE_FIELDS})
+    )
+    stats = {"inserted": 0, "updated": 0}
+
+    for chunk in _chunks(read_rows(stream, fmt), chunk_size):
+        # Внутри пачки выигрывает последняя запись с тем же заголовком
+        by_title = {row["title"]: dict(row, excerpt=make_excerpt(row["description"])) for row in chunk}
+        with engine.begin() as conn:
+            existing = dict(conn.execute(
+                select(table.c.title, table.c.id).where(table.c.title.in_(list(by_title)))
+            ).all())
+            inserts = [row for title, row in by_title.items() if title not in existing]
+            updates = [dict(row, _id=existing[title]) for title, row in by_title.items() if title in existing]
+            if inserts:
+                conn.execute(insert(table), inserts)
+            if updates:
+                conn.execute(update_stmt, updates)
+            # Запись в обход ORM - версию для ETag поднимаем сами
+            bump_table_version(conn, table.name)
+        # Другие процессы увидят новую версию через VACANCY_VERSION_TTL, этот - сразу
+        vacancy_cache.clear()
+        stats["inserted"] += len(inserts)
+        stats["updated"] += len(updates)
+    return stats
+
+def _serialize(vacancy) -> dict:
+    row = {name: getattr(vacancy, name) for name in FIELDS}
+    for name in ("created_at", "updated_at"):
+        if isinstance(row[name], datetime):
+            row[name] = row[name].isoformat()
+    return row
+
+def export_vacancies(stream, fmt: str = "jsonl", batch_size: int = 5000, engine=None) -> int:
+    """Выгружает все вакансии в поток, не загружая таблицу в память целиком"""
+    from sqlalchemy.orm import Session
+    from app.database import read_engine
+    from app.models import Vacancy
+
+    writer = csv.DictWriter(stream, fieldnames=FIELDS) if fmt == "csv" else None
+    if writer:
+        writer.writeheader()
+    count = 0
+    with Session(engine or read_engine) as db:
+        query = select(Vacancy).order_by(Vacancy.id).execution_options(yield_per=batch_size)
+        for vacancy in db.scalars(query):
+            row = _serialize(vacancy)
+            if writer:
+                writer.writerow(row)
+            else:
+                stream.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+def _open(path: str, mode: str):
+    if path == "-":
+        return nullcontext(sys.stdin if "r" in mode else sys.stdout)
+    return open(path, mode, encoding="utf-8", newline="")
+
+def main_import(argv):
+    parser = argparse.ArgumentParser(prog="manage.py import-vacancies")
+    parser.add_argument("path", help="JSONL or CSV file, '-' for stdin")
+    parser.add_argument("--format", choices=["jsonl", "csv"])
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    with _open(args.path, "r") as stream:
+        stats = import_vacancies(stream, _detect_format(args.path, args.format), args.chunk_size)
+    print(f"Imported vacancies: {stats['inserted']} inserted, {stats['updated']} updated", file=sys.stderr)
+
+def main_export(argv):
+    parser = argparse.ArgumentParser(prog="manage.py export-vacancies")
+    parser.add_argument("path", help="JSONL or CSV file, '-' for stdout")
+    parser.add_argument("--format", choices=["jsonl", "csv"])
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    with _open(args.path, "w") as stream:
+        count = export_vacancies(stream, _detect_format(args.path, args.format), args.batch_size)
+    print(f"Exported vacancies: {count}", file=sys.stderr)
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "import":
+        main_import(sys.argv[2:])
+    elif command == "export":
+        main_export(sys.argv[2:])
+    else:
+        print("Usage: vacancy_io.py import|export <path> [--format jsonl|csv]")
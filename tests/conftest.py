@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# Добавляем путь к проекту для импортов
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Тесты работают с отдельной временной БД, а не с ./arq.db.
+# Переменная задаётся до первого импорта app.database.
+_test_db_dir = tempfile.mkdtemp(prefix="arq-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_test_db_dir, 'test.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
@@ -1,4 +1,5 @@
 import os
+import hashlib
 import sys
 import time
 import pytest
@@ -11,6 +12,17 @@ from app.auth import create_access_token, verify_token
 # Добавляем путь к проекту для импортов
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+def make_admin(username: str, hashed_password: str = "not-a-real-hash"):
+    """Создаёт администратора заново: verify_token принимает токены только существующих"""
+    from app.database import Base, engine, SessionLocal
+    from app.models import AdminUser
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.query(AdminUser).filter_by(username=username).delete()
+        db.add(AdminUser(username=username, hashed_password=hashed_password))
+        db.commit()
+
 def test_password_hashing():
     """Тест: хеширование пароля работает"""
     from app.auth import get_password_hash, verify_password
@@ -44,6 +56,7 @@ def test_jwt_token_creation():
 
 def test_jwt_token_verification():
     """Тест: верификация JWT токена"""
+    make_admin("testuser")
     data = {"sub": "testuser"}
     token = create_access_token(data)
     
@@ -86,3 +99,378 @@ def test_token_without_exp():
     # Токен без срока должен вернуть None (т.к. require_exp=True)
     assert payload is None
     print("Token without timedelta drop success!")
+
+def test_password_async_variants():
+    """Тест: асинхронные варианты хеширования дают совместимые хеши"""
+    import asyncio
+    from app.auth import get_password_hash_async, verify_password_async
+
+    async def run():
+        hashed = await get_password_hash_async("async_password")
+        assert verify_password("async_password", hashed)
+        assert await verify_password_async("async_password", hashed)
+        assert not await verify_password_async("wrong_password", hashed)
+
+    asyncio.run(run())
+
+def test_hash_pool_rejects_when_saturated():
+    """Тест: переполненный пул сразу отклоняет задачу, а не ставит в очередь"""
+    import asyncio
+    import threading
+    from app.auth import BoundedHashPool, HashPoolSaturated
+
+    pool = BoundedHashPool(workers=1, queue_limit=1)
+    release = threading.Event()
+
+    async def run():
+        busy = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert pool.in_flight == 2
+
+        started = time.perf_counter()
+        with pytest.raises(HashPoolSaturated):
+            await pool.run(release.wait)
+        assert time.perf_counter() - started < 0.05
+        assert pool.rejected == 1
+
+        release.set()
+        await asyncio.gather(*busy)
+        assert pool.in_flight == 0
+        # После освобождения места задачи снова принимаются
+        assert await pool.run(lambda: 42) == 42
+
+    asyncio.run(run())
+    pool.shutdown()
+
+def test_login_endpoint():
+    """Тест: вход администратора через /auth/login"""
+    from fastapi.testclient import TestClient
+    from app.database import Base, engine, SessionLocal
+    from app.models import AdminUser
+    from app.main import app
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.query(AdminUser).filter_by(username="loginadmin").delete()
+    db.add(AdminUser(username="loginadmin", hashed_password=get_password_hash("secret123")))
+    db.commit()
+    db.close()
+
+    with TestClient(app) as client:
+        response = client.post("/auth/login", json={"username": "loginadmin", "password": "secret123"})
+        assert response.status_code == 200
+        assert verify_token(response.json()["access_token"])["sub"] == "loginadmin"
+
+        response = client.post("/auth/login", json={"username": "loginadmin", "password": "wrong"})
+        assert response.status_code == 401
+        response = client.post("/auth/login", json={"username": "nobody", "password": "secret123"})
+        assert response.status_code == 401
+
+def test_login_does_not_hold_writer_connection_while_hashing(monkeypatch):
+    """Тест: пока проверяется пароль, единственное соединение писателя SQLite свободно"""
+    from fastapi.testclient import TestClient
+    from app import database
+    from app.main import app
+
+    make_admin("pooladmin", get_password_hash("secret123"))
+    checked_out = []
+
+    async def verify(password, hashed):
+        checked_out.append(database.async_engine.sync_engine.pool.checkedout())
+        return verify_password(password, hashed)
+
+    monkeypatch.setattr("app.routers.admin.verify_password_async", verify)
+    with TestClient(app) as client:
+        response = client.post("/auth/login", json={"username": "pooladmin", "password": "secret123"})
+        assert response.status_code == 200 and response.json()["refresh_token"]
+    assert checked_out == [0]
+
+def test_token_cache_hits_and_revocation():
+    """Тест: повторная проверка берётся из кеша, отзыв действует сразу"""
+    from app.auth import token_cache, revoke_token, revoke_user_tokens
+
+    make_admin("cacheuser")
+    make_admin("cacheuser2")
+    token = create_access_token({"sub": "cacheuser"})
+    misses, hits = token_cache.misses, token_cache.hits
+    assert verify_token(token)["sub"] == "cacheuser"
+    assert verify_token(token)["sub"] == "cacheuser"
+    assert token_cache.misses == misses + 1
+    assert token_cache.hits == hits + 1
+
+    # Изменение возвращённого payload не портит кеш
+    verify_token(token)["sub"] = "hacker"
+    assert verify_token(token)["sub"] == "cacheuser"
+
+    revoke_token(token)
+    assert verify_token(token) is None
+
+    other = create_access_token({"sub": "cacheuser2"})
+    assert verify_token(other) is not None
+    revoke_user_tokens("cacheuser2")
+    assert verify_token(other) is None
+
+def test_token_issued_right_after_revocation_is_valid():
+    """Тест: токен, выданный в ту же секунду после отзыва, действует"""
+    from app.auth import revoke_user_tokens
+
+    make_admin("samesecond")
+    old = create_access_token({"sub": "samesecond"})
+    revoke_user_tokens("samesecond")
+    new = create_access_token({"sub": "samesecond"})
+    assert verify_token(old) is None
+    assert verify_token(new)["sub"] == "samesecond"
+
+def test_user_revocation_is_shared_through_database():
+    """Тест: отзыв из другого процесса (CLI) виден серверу после промаха кеша"""
+    from app.auth import token_cache
+    from app.database import SessionLocal
+    from app.models import AdminUser
+
+    make_admin("sharedrevoke")
+    make_admin("deletedadmin")
+    token = create_access_token({"sub": "sharedrevoke"})
+    deleted = create_access_token({"sub": "deletedadmin"})
+    assert verify_token(token)["sub"] == "sharedrevoke"
+    assert verify_token(deleted)["sub"] == "deletedadmin"
+
+    # Так отзывает admin_manager: своим кешем, но с записью в БД
+    with SessionLocal() as db:
+        db.query(AdminUser).filter_by(username="sharedrevoke").update({"tokens_valid_after": time.time()})
+        db.query(AdminUser).filter_by(username="deletedadmin").delete()
+        db.commit()
+    assert verify_token(token) is not None  # Кеш этого процесса ещё не знает (до TOKEN_CACHE_TTL)
+    token_cache.clear()
+    assert verify_token(token) is None
+    assert verify_token(deleted) is None
+    assert verify_token(create_access_token({"sub": "sharedrevoke"}))["sub"] == "sharedrevoke"
+
+def test_token_revocation_column_migration(tmp_path):
+    """Тест: старая БД без tokens_valid_after дополняется колонкой"""
+    from sqlalchemy import create_engine, inspect
+    from app.crud import add_token_revocation_column
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE admin_users (id INTEGER PRIMARY KEY, username VARCHAR(50))")
+    assert add_token_revocation_column(engine)
+    assert not add_token_revocation_column(engine)
+    assert "tokens_valid_after" in {c["name"] for c in inspect(engine).get_columns("admin_users")}
+    engine.dispose()
+
+def test_token_cache_entry_expires_with_token():
+    """Тест: запись кеша живёт не дольше exp токена"""
+    from app.auth import TokenCache
+
+    cache = TokenCache(maxsize=2, ttl=300)
+    digest = cache.digest("token")
+    cache.put(digest, {"sub": "u", "exp": time.time() + 0.05})
+    assert cache.get(digest) is not None
+    time.sleep(0.1)
+    assert cache.get(digest) is None
+
+    # LRU вытесняет самую старую запись
+    for name in ("a", "b", "c"):
+        cache.put(cache.digest(name), {"sub": name, "exp": time.time() + 60})
+    assert cache.get(cache.digest("a")) is None
+    assert cache.get(cache.digest("c"))["sub"] == "c"
+
+def test_logout_endpoint():
+    """Тест: после /auth/logout токен не принимается"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    make_admin("logoutadmin")
+    token = create_access_token({"sub": "logoutadmin"})
+    headers = {"Authorization": f"Bearer {token}"}
+    with TestClient(app) as client:
+        assert client.post("/auth/logout", headers=headers).status_code == 204
+        assert client.post("/auth/logout", headers=headers).status_code == 401
+
+def test_me_endpoint():
+    """Тест: /auth/me требует валидный токен"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    make_admin("meadmin")
+    token = create_access_token({"sub": "meadmin"})
+    with TestClient(app) as client:
+        response = client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+        assert response.json() == {"username": "meadmin"}
+        assert client.get("/auth/me", headers={"Authorization": "Bearer bad"}).status_code == 401
+
+def test_heavy_objects_are_lazy():
+    """Тест: импорт app.auth и app.database не загружает passlib/PyJWT (auth - и Starlette) и не создаёт движки"""
+    import subprocess
+
+    code = (
+        "import sys, app.auth; "
+        "assert 'starlette' not in sys.modules, 'auth imports the web framework'; "
+        "import app.database as db; "
+        "assert 'passlib' not in sys.modules and 'jwt' not in sys.modules, 'auth'; "
+        "assert not db._lazy_objects, 'database'"
+    )
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", code], cwd=project_dir, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+def test_refresh_token_rotation_and_reuse_detection():
+    """Тест: refresh выдаёт новую пару, повторное использование отзывает цепочку"""
+    from fastapi.testclient import TestClient
+    from app.database import Base, engine, SessionLocal
+    from app.models import AdminUser
+    from app.main import app
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.query(AdminUser).filter_by(username="refreshadmin").delete()
+    db.add(AdminUser(username="refreshadmin", hashed_password=get_password_hash("secret123")))
+    db.commit()
+    db.close()
+
+    with TestClient(app) as client:
+        tokens = client.post("/auth/login", json={"username": "refreshadmin", "password": "secret123"}).json()
+        assert tokens["refresh_token"]
+        assert tokens["expires_in"] > 0
+
+        rotated = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+        assert rotated.status_code == 200
+        rotated = rotated.json()
+        assert rotated["refresh_token"] != tokens["refresh_token"]
+        assert verify_token(rotated["access_token"])["sub"] == "refreshadmin"
+
+        # Старый refresh-токен использован повторно - отзывается вся цепочка
+        reused = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+        assert reused.status_code == 401
+        # Выданные по цепочке access-токены отозваны и для других процессов
+        with SessionLocal() as db:
+            assert db.query(AdminUser).filter_by(username="refreshadmin").one().tokens_valid_after is not None
+        assert client.post("/auth/refresh", json={"refresh_token": rotated["refresh_token"]}).status_code == 401
+
+        assert client.post("/auth/refresh", json={"refresh_token": "unknown"}).status_code == 401
+
+def test_refresh_after_logout_is_not_reuse():
+    """Тест: refresh-токен после выхода просто недействителен, другие устройства не разлогиниваются"""
+    from fastapi.testclient import TestClient
+    from app.database import SessionLocal
+    from app.models import AdminUser
+    from app.main import app
+
+    make_admin("logoutadmin", get_password_hash("secret123"))
+
+    with TestClient(app) as client:
+        credentials = {"username": "logoutadmin", "password": "secret123"}
+        laptop = client.post("/auth/login", json=credentials).json()
+        phone = client.post("/auth/login", json=credentials).json()
+
+        response = client.post(
+            "/auth/logout",
+            json={"refresh_token": laptop["refresh_token"]},
+            headers={"Authorization": f"Bearer {laptop['access_token']}"},
+        )
+        assert response.status_code == 204
+
+        replayed = client.post("/auth/refresh", json={"refresh_token": laptop["refresh_token"]})
+        assert replayed.status_code == 401
+        assert replayed.json()["detail"] == "Invalid or expired refresh token"
+        with SessionLocal() as db:
+            assert db.query(AdminUser).filter_by(username="logoutadmin").one().tokens_valid_after is None
+        assert client.get("/auth/me", headers={"Authorization": f"Bearer {phone['access_token']}"}).status_code == 200
+        assert client.post("/auth/refresh", json={"refresh_token": phone["refresh_token"]}).status_code == 200
+
+def test_refresh_token_hash_is_fast_digest():
+    """Тест: refresh-токены хранятся как SHA-256, а не Argon2"""
+    from app.auth import create_refresh_token, hash_refresh_token
+
+    token = create_refresh_token()
+    assert len(token) >= 40
+    assert hash_refresh_token(token) == hashlib.sha256(token.encode()).hexdigest()
+
+def test_login_rehashes_outdated_password_hash():
+    """Тест: хеш со старыми параметрами Argon2 пересчитывается после входа"""
+    from fastapi.testclient import TestClient
+    from app.auth import make_pwd_context, password_needs_rehash
+    from app.database import Base, engine, SessionLocal
+    from app.models import AdminUser
+    from app.main import app
+
+    old_hash = make_pwd_context(time_cost=1, memory_cost=8192, parallelism=1).hash("secret123")
+    assert password_needs_rehash(old_hash)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.query(AdminUser).filter_by(username="rehashadmin").delete()
+    db.add(AdminUser(username="rehashadmin", hashed_password=old_hash))
+    db.commit()
+    db.close()
+
+    with TestClient(app) as client:
+        response = client.post("/auth/login", json={"username": "rehashadmin", "password": "secret123"})
+        assert response.status_code == 200
+
+    db = SessionLocal()
+    new_hash = db.query(AdminUser).filter_by(username="rehashadmin").one().hashed_password
+    db.close()
+    assert new_hash != old_hash
+    assert not password_needs_rehash(new_hash)
+    assert verify_password("secret123", new_hash)
+
+def test_token_bucket_burst_and_refill():
+    """Тест: корзина пропускает burst попыток и пополняется со временем"""
+    from app.ratelimit import MemoryBucketStore, TokenBucketLimiter, RATE_LIMITED
+
+    limiter = TokenBucketLimiter("ip", burst=3, per_minute=60, store=MemoryBucketStore())
+    rejected_before = RATE_LIMITED.value("ip")
+    assert all(limiter.allow("1.2.3.4", now=100.0) for _ in range(3))
+    assert not limiter.allow("1.2.3.4", now=100.0)
+    assert limiter.allow("5.6.7.8", now=100.0)  # Другой ключ - своя корзина
+    assert limiter.allow("1.2.3.4", now=101.0)  # 1 токен в секунду
+    assert not limiter.allow("1.2.3.4", now=101.0)
+    assert RATE_LIMITED.value("ip") == rejected_before + 2
+
+def test_sqlite_bucket_store_shared(tmp_path):
+    """Тест: два хранилища на одном файле делят счётчики, как разные воркеры"""
+    from app.ratelimit import SQLiteBucketStore, TokenBucketLimiter
+
+    path = str(tmp_path / "buckets.db")
+    first = TokenBucketLimiter("username", burst=2, per_minute=1, store=SQLiteBucketStore(path))
+    second = TokenBucketLimiter("username", burst=2, per_minute=1, store=SQLiteBucketStore(path))
+    assert first.allow("admin", now=10.0)
+    assert second.allow("admin", now=10.0)
+    assert not first.allow("admin", now=10.0)
+    assert not second.allow("admin", now=11.0)
+    assert first.allow("admin", now=70.0)
+
+def test_login_rate_limited_before_hashing(monkeypatch):
+    """Тест: лишние попытки входа получают 429 без проверки пароля"""
+    from fastapi.testclient import TestClient
+    from app import ratelimit
+    from app.main import app
+
+    monkeypatch.setattr(ratelimit, "_store", ratelimit.MemoryBucketStore())
+    monkeypatch.setattr(ratelimit, "LOGIN_USER_BURST", 2)
+    calls = []
+    monkeypatch.setattr("app.routers.admin.verify_password_async",
+                        lambda *args: calls.append(args) or _false())
+
+    with TestClient(app) as client:
+        for _ in range(2):
+            response = client.post("/auth/login", json={"username": "victim", "password": "guess"})
+            assert response.status_code == 401
+        response = client.post("/auth/login", json={"username": "Victim", "password": "guess"})
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) > 0
+        assert 'login_rate_limited_total{scope="username"}' in client.get("/metrics").text
+    assert len(calls) == 2
+
+def test_token_bucket_accepts_zero_timestamp():
+    """Тест: now=0.0 - заданное время, а не признак "взять текущее"."""
+    from app.ratelimit import MemoryBucketStore, TokenBucketLimiter
+
+    limiter = TokenBucketLimiter("test", burst=1, per_minute=60, store=MemoryBucketStore())
+    assert limiter.allow("k", now=0.0)
+    assert not limiter.allow("k", now=0.5)
+    assert limiter.allow("k", now=1.0)
+
+async def _false():
+    return False
@@ -0,0 +1,66 @@
+import gzip
+import zlib
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.compression import CompressionMiddleware
+
+TEXT = "Ведущий инженер-конструктор, опыт работы с Revit и AutoCAD. " * 40
+
+def make_client(**kwargs):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500, **kwargs)
+
+    @app.get("/text")
+    async def text(size: int = len(TEXT)):
+        return Response(TEXT[:size], media_type="text/plain; charset=utf-8")
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(5):
+                yield f"chunk {i}: {TEXT}\n".encode()
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    @app.get("/png")
+    async def png():
+        return Response(b"\x89PNG" + b"\0" * 4000, media_type="image/png")
+
+    @app.get("/precompressed")
+    async def precompressed():
+        return Response(gzip.compress(TEXT.encode()), media_type="text/plain",
+                        headers={"Content-Encoding": "gzip"})
+
+    return TestClient(app)
+
+def test_compresses_large_text_only():
+    """Тест: сжимаются только текстовые ответы крупнее порога"""
+    client = make_client()
+    response = client.get("/text", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) < len(TEXT.encode()) / 5
+    assert response.text == TEXT
+    assert "Accept-Encoding" in response.headers["vary"]
+
+    assert "content-encoding" not in client.get("/text", params={"size": 100}, headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/png", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/text", headers={"Accept-Encoding": "identity"}).headers
+
+def test_streaming_response_compressed_per_chunk():
+    """Тест: потоковый ответ сжимается по кускам, каждый кусок распаковывается сразу"""
+    client = make_client(levels={"gzip": 1})
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        decompressor = zlib.decompressobj(31)
+        parts = [decompressor.decompress(chunk) for chunk in response.iter_raw()]
+    # Z_SYNC_FLUSH: первый кусок читается целиком, не дожидаясь конца ответа
+    assert parts[0].decode().startswith("chunk 0: ") and parts[0].endswith(b"\n")
+    assert b"".join(parts).decode().count("chunk ") == 5
+
+def test_precompressed_passes_through():
+    """Тест: ответ с Content-Encoding не сжимается повторно"""
+    response = make_client().get("/precompressed", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == TEXT
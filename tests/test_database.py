@@ -164,6 +164,242 @@ def test_crud_operations_flow(test_db):
     
     print("Full cycle of CRUD: success!")
 
+def test_async_session_shares_metadata():
+    """Тест: асинхронная сессия работает с теми же моделями Base"""
+    import asyncio
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+        async with session_factory() as db:
+            db.add(Vacancy(title="Async developer", description="asyncio", is_active=True))
+            await db.commit()
+            result = await db.execute(select(Vacancy).filter_by(title="Async developer"))
+            found = result.scalar_one()
+        await engine.dispose()
+        return found
+
+    found = asyncio.run(run())
+    assert found.id is not None
+    assert found.description == "asyncio"
+
+def test_get_async_db_yields_session():
+    """Тест: get_async_db отдаёт AsyncSession и закрывает её"""
+    import asyncio
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from app.database import get_async_db
+
+    async def run():
+        gen = get_async_db()
+        db = await gen.__anext__()
+        assert isinstance(db, AsyncSession)
+        result = await db.execute(text("SELECT 1"))
+        assert result.scalar() == 1
+        await gen.aclose()
+
+    asyncio.run(run())
+
+def test_track_sql_counts_and_detects_n_plus_one(test_db, monkeypatch, caplog):
+    """Тест: счётчики SQL и детектор повторяющихся запросов (N+1)"""
+    import app.instrumentation as instrumentation
+
+    monkeypatch.setattr(instrumentation, "SQL_N1_DETECT", True)
+    instrumentation.instrument_engine(test_db.get_bind())
+
+    with instrumentation.track_sql("n+1 test") as stats:
+        # Как в create_test_data: по запросу на каждую строку
+        for i in range(6):
+            test_db.query(Vacancy).filter_by(title=f"Vacancy {i}").first()
+
+    assert stats.query_count == 6
+    assert stats.total_time > 0
+    assert stats.slowest_statement is not None
+    assert len(stats.repeated_shapes(threshold=5)) == 1
+    assert "Possible N+1" in caplog.text
+
+def test_failed_statement_does_not_leak_start_time(tmp_path):
+    """Тест: ошибка SQL не оставляет время начала запроса в conn.info"""
+    from sqlalchemy.exc import OperationalError
+    from app.database import make_engine
+
+    engine = make_engine(f"sqlite:///{tmp_path / 'errors.db'}")
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing_table"))
+        conn.execute(text("SELECT 1"))
+        assert conn.info["query_start"] == []
+    engine.dispose()
+
+def test_sqlite_production_profile_and_read_pool(tmp_path):
+    """Тест: профиль production включает WAL, пул чтения не принимает записи"""
+    from sqlalchemy.exc import OperationalError
+    from app.database import make_engine
+
+    url = f"sqlite:///{tmp_path / 'profile.db'}"
+    writer = make_engine(url, profile="production")
+    reader = make_engine(url, readonly=True, profile="production")
+    Base.metadata.create_all(bind=writer)
+
+    with writer.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+    assert writer.pool.size() == 1
+
+    with reader.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA query_only").scalar() == 1
+        with pytest.raises(OperationalError):
+            conn.exec_driver_sql("DELETE FROM vacancies")
+
+    writer.dispose()
+    reader.dispose()
+
+def test_sqlite_pragma_env_override(monkeypatch):
+    """Тест: отдельную PRAGMA профиля можно переопределить переменной окружения"""
+    from app.database import sqlite_pragmas
+
+    monkeypatch.setenv("SQLITE_MMAP_SIZE", "0")
+    pragmas = sqlite_pragmas("production")
+    assert pragmas["mmap_size"] == "0"
+    assert pragmas["journal_mode"] == "WAL"
+    with pytest.raises(ValueError):
+        sqlite_pragmas("turbo")
+
+def test_vacancy_import_export_roundtrip(tmp_path):
+    """Тест: потоковый импорт с upsert по title и экспорт в JSONL/CSV"""
+    import io
+    import json
+    from scripts.vacancy_io import export_vacancies, import_vacancies
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'io.db'}")
+    Base.metadata.create_all(bind=engine)
+
+    source = io.StringIO(
+        json.dumps({"title": "Python", "description": "Бэкенд"}, ensure_ascii=False) + "\n"
+        + json.dumps({"title": "Go", "description": "Сервисы", "is_active": False}) + "\n"
+        + json.dumps({"title": "Rust", "description": "Системы"}) + "\n"
+    )
+    assert import_vacancies(source, "jsonl", chunk_size=2, engine=engine) == {"inserted": 3, "updated": 0}
+
+    # Повторный импорт обновляет по заголовку, а не дублирует
+    source = io.StringIO("title,description,requirements,is_active\nPython,FastAPI,Python 3.11,1\nJava,Spring,,0\n")
+    assert import_vacancies(source, "csv", engine=engine) == {"inserted": 1, "updated": 1}
+
+    out = io.StringIO()
+    assert export_vacancies(out, "jsonl", batch_size=2, engine=engine) == 4
+    rows = {row["title"]: row for row in map(json.loads, out.getvalue().splitlines())}
+    assert rows["Python"]["description"] == "FastAPI"
+    assert rows["Python"]["requirements"] == "Python 3.11"
+    assert rows["Go"]["is_active"] is False
+    assert rows["Java"]["is_active"] is False
+
+    out = io.StringIO()
+    export_vacancies(out, "csv", engine=engine)
+    assert out.getvalue().splitlines()[0].startswith("title,description")
+    engine.dispose()
+
+def test_excerpt_maintained_and_backfilled(tmp_path):
+    """Тест: анонс пересчитывается при смене описания, старые БД дополняются backfill_excerpts"""
+    from app.crud import backfill_excerpts
+    from app.models import EXCERPT_LENGTH
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        # Схема до появления колонки excerpt
+        conn.exec_driver_sql(
+            "CREATE TABLE vacancies (id INTEGER PRIMARY KEY, title VARCHAR(200) NOT NULL, "
+            "description TEXT NOT NULL, requirements TEXT, is_active BOOLEAN, "
+            "created_at DATETIME, updated_at DATETIME)"
+        )
+        conn.exec_driver_sql("INSERT INTO vacancies (title, description) VALUES ('Old', 'Слово ' || printf('%.500c', 'x'))")
+    assert backfill_excerpts(engine) == 1
+    assert backfill_excerpts(engine) == 0
+    Base.metadata.create_all(bind=engine)  # Недостающие таблицы (версии, tombstones)
+
+    session = sessionmaker(bind=engine)()
+    vacancy = session.get(Vacancy, 1)
+    assert vacancy.excerpt.endswith("…") and len(vacancy.excerpt) <= EXCERPT_LENGTH + 1
+    vacancy.description = "Коротко\n  о главном"
+    session.commit()
+    assert vacancy.excerpt == "Коротко о главном"
+    vacancy.title = "Renamed"  # Описание не менялось - анонс тот же
+    session.commit()
+    assert vacancy.excerpt == "Коротко о главном"
+    session.close()
+
+def test_change_feed_timestamps_on_old_schema(tmp_path):
+    """Тест: в БД без DEFAULT у updated_at новые строки всё равно получают время, старые - backfill"""
+    from sqlalchemy import inspect
+    from app.crud import backfill_updated_at, create_vacancy_indexes
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        # updated_at до ленты изменений: только onupdate, без DEFAULT в схеме
+        conn.exec_driver_sql(
+            "CREATE TABLE vacancies (id INTEGER PRIMARY KEY, title VARCHAR(200) NOT NULL, "
+            "description TEXT NOT NULL, requirements TEXT, excerpt VARCHAR(255), is_active BOOLEAN, "
+            "created_at DATETIME DEFAULT CURRENT_TIMESTAMP, updated_at DATETIME)"
+        )
+        conn.exec_driver_sql("INSERT INTO vacancies (title, description) VALUES ('Old', 'Описание')")
+    Base.metadata.create_all(bind=engine)
+
+    assert backfill_updated_at(engine) == 1
+    assert backfill_updated_at(engine) == 0
+    assert "ix_vacancies_updated_id" in create_vacancy_indexes(engine)
+    assert "ix_vacancies_updated_id" in {index["name"] for index in inspect(engine).get_indexes("vacancies")}
+
+    session = sessionmaker(bind=engine)()
+    session.add(Vacancy(title="New", description="Описание"))
+    session.commit()
+    assert all(v.updated_at is not None for v in session.query(Vacancy))
+    session.close()
+    engine.dispose()
+
+def test_migrate_baseline_schema(tmp_path):
+    """Тест: migrate доводит БД первой версии до текущей схемы, список идёт по индексу"""
+    from sqlalchemy import inspect
+    from app.queries import VACANCY_PAGE
+    from scripts.init_db import migrate_database
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    with engine.begin() as conn:
+        # Схема, которую создавал create_all до этой серии изменений
+        for statement in (
+            "CREATE TABLE vacancies (id INTEGER NOT NULL PRIMARY KEY, title VARCHAR(200) NOT NULL, "
+            "description TEXT NOT NULL, requirements TEXT, is_active BOOLEAN, "
+            "created_at DATETIME DEFAULT (CURRENT_TIMESTAMP), updated_at DATETIME)",
+            "CREATE INDEX ix_vacancies_id ON vacancies (id)",
+            "CREATE INDEX ix_vacancies_title ON vacancies (title)",
+            "CREATE TABLE admin_users (id INTEGER NOT NULL PRIMARY KEY, username VARCHAR(50) NOT NULL UNIQUE, "
+            "hashed_password VARCHAR(255) NOT NULL, created_at DATETIME DEFAULT (CURRENT_TIMESTAMP))",
+            "INSERT INTO vacancies (title, description, is_active) VALUES ('Old', 'Описание', 1)",
+        ):
+            conn.exec_driver_sql(statement)
+
+    stats = migrate_database(engine)
+    assert stats["token_revocation_column"] and stats["excerpts"] == 1
+    assert {"ix_vacancies_active_created_id", "ix_vacancies_updated_id"} <= set(stats["indexes"])
+    assert migrate_database(engine) == {
+        "token_revocation_column": False, "refresh_token_replaced_column": False,
+        "excerpts": 0, "updated_at": 0, "indexes": [],
+    }
+    assert "tokens_valid_after" in {c["name"] for c in inspect(engine).get_columns("admin_users")}
+
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT count(*) FROM vacancies WHERE updated_at IS NULL").scalar() == 0
+        compiled = VACANCY_PAGE.compile(engine)
+        params = compiled.construct_params({"is_active": True, "limit": 20})
+        plan = " ".join(row[-1] for row in conn.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {compiled}", tuple(params[name] for name in compiled.positiontup)
+        ))
+    assert "ix_vacancies_active_created_id" in plan and "TEMP B-TREE" not in plan
+    engine.dispose()
+
 if __name__ == "__main__":
     """
     Запуск тестов без pytest (для отладки)
@@ -0,0 +1,69 @@
+import json
+import logging
+import os
+import queue
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.logs import (
+    LOG_DROPPED, JsonFormatter, NonBlockingQueueHandler, RepeatFilter, RequestIdFilter,
+)
+
+def make_record(msg, *args, name="app.test", level=logging.WARNING):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+def test_repeat_filter_limits_identical_messages():
+    """Тест: сверх burst одинаковых сообщений за окно отбрасываются, следующее окно сообщает сколько"""
+    repeat = RepeatFilter(burst=3, window=60)
+    passed = [repeat.filter(make_record("Invalid token: %s", i)) for i in range(10)]
+    assert passed == [True] * 3 + [False] * 7
+    assert repeat.filter(make_record("Other message"))  # Другой шаблон - свой счётчик
+
+    repeat.window = 0  # Окно истекло
+    record = make_record("Invalid token: %s", "late")
+    assert repeat.filter(record) and record.suppressed == 7
+
+    # Журнал доступа - одна строка на запрос, не повтор
+    access = [repeat.filter(make_record('%s - "%s %s"', "127.0.0.1", "GET", i, name="uvicorn.access"))
+              for i in range(10)]
+    assert all(access)
+
+def test_queue_handler_drops_instead_of_blocking():
+    """Тест: при заполненной очереди запись отбрасывается, а не ждёт места"""
+    handler = NonBlockingQueueHandler(queue.Queue(1))
+    dropped = LOG_DROPPED.value("queue_full")
+    handler.handle(make_record("first %s", 1))
+    handler.handle(make_record("second %s", 2))
+    assert handler.queue.qsize() == 1
+    assert handler.queue.get_nowait().msg == "first 1"  # Аргументы подставлены в потоке запроса
+    assert LOG_DROPPED.value("queue_full") == dropped + 1
+
+def test_json_formatter():
+    """Тест: запись - одна строка JSON с request_id и числом пропущенных повторов"""
+    record = make_record("Token error: %s", "bad")
+    record.request_id, record.suppressed = "req-1", 4
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "Token error: bad" and entry["level"] == "WARNING"
+    assert entry["request_id"] == "req-1" and entry["suppressed"] == 4
+
+def test_request_id_reaches_token_logs():
+    """Тест: лог отклонённого токена получает X-Request-ID запроса, заголовок возвращается в ответе"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    handler = NonBlockingQueueHandler(queue.Queue())
+    handler.addFilter(RequestIdFilter())
+    auth_logger = logging.getLogger("app.auth")
+    auth_logger.addHandler(handler)
+    try:
+        client = TestClient(app)
+        response = client.get("/auth/me", headers={"Authorization": "Bearer bad", "X-Request-ID": "req-42"})
+        assert response.status_code == 401 and response.headers["X-Request-ID"] == "req-42"
+
+        response = client.get("/health", headers={"X-Request-ID": "bad id\n"})
+        assert response.headers["X-Request-ID"] not in ("", "bad id\n")  # Недопустимый - заменён новым
+    finally:
+        auth_logger.removeHandler(handler)
+    record = handler.queue.get_nowait()
+    assert record.request_id == "req-42" and record.msg.startswith("Invalid token")
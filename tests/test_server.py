@@ -0,0 +1,73 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_fork_rebuilds_engines_in_child():
+    """Тест: после fork воркер не использует движок и пул соединений родителя"""
+    from sqlalchemy import text
+    from app import database
+
+    with database.engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    parent_engine = database.engine
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        ok = not database._lazy_objects and database.engine is not parent_engine
+        with database.engine.connect() as conn:
+            ok = ok and conn.execute(text("SELECT 1")).scalar() == 1
+        os.write(write_fd, b"1" if ok else b"0")
+        os._exit(0)
+    os.close(write_fd)
+    result = os.read(read_fd, 1)
+    os.close(read_fd)
+    os.waitpid(pid, 0)
+    assert result == b"1"
+    assert database.engine is parent_engine
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _get(url: str, timeout: float = 10.0) -> int:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(url, timeout=2) as response:
+                return response.status
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+def test_serve_recycles_workers_and_stops_gracefully(tmp_path):
+    """Тест: manage.py serve поднимает воркеры, перезапускает их после лимита запросов и плавно останавливается"""
+    port = _free_port()
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'serve.db'}", WARMUP_ENABLED="0")
+    process = subprocess.Popen(
+        [sys.executable, "manage.py", "serve", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", "2", "--max-requests", "3", "--graceful-timeout", "5"],
+        cwd=PROJECT_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    try:
+        for _ in range(12):  # Больше, чем 2 воркера x 3 запроса
+            assert _get(f"http://127.0.0.1:{port}/health") == 200
+            time.sleep(0.15)  # uvicorn проверяет лимит запросов раз в 0.1 с
+    finally:
+        process.send_signal(signal.SIGTERM)
+        output, _ = process.communicate(timeout=20)
+    assert process.returncode == 0, output
+    assert "Maximum request limit" in output
+    # Логи uvicorn идут через обработчик-очередь приложения (JSON), а не свои
+    assert '"logger": "uvicorn.access"' in output and '"logger": "uvicorn.error"' in output
+    assert output.count(" started") >= 3  # Вместо отработавших лимит запущены новые
@@ -0,0 +1,130 @@
+import os
+import pytest
+
+from app.database import Base, engine, SessionLocal
+from app.models import Vacancy
+from app import static_site
+from app.static_site import build_site
+
+@pytest.fixture
+def vacancies():
+    """Фикстура: три активные вакансии в пустой таблице"""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.query(Vacancy).delete()
+    db.add_all(Vacancy(title=f"Вакансия {i}", description="Описание <b>", requirements="Python") for i in range(3))
+    db.commit()
+    ids = [v.id for v in db.query(Vacancy).order_by(Vacancy.id)]
+    db.close()
+    return ids
+
+def test_build_static_pages(tmp_path, vacancies):
+    """Тест: сборка рендерит лендинг, список и карточки с экранированием"""
+    stats = build_site(str(tmp_path), engine=engine)
+    assert stats == {"rendered": 5, "unchanged": 0, "removed": 0}
+
+    detail = (tmp_path / "jobs" / "vacancies" / str(vacancies[0]) / "index.html").read_text()
+    assert "Вакансия 0" in detail and "Описание &lt;b&gt;" in detail
+    listing = (tmp_path / "jobs" / "vacancies" / "index.html").read_text()
+    assert "Вакансия 2" in listing and f'href="/jobs/vacancies/{vacancies[2]}/"' in listing
+    assert (tmp_path / "jobs" / "index.html").exists()
+
+def test_build_static_incremental(tmp_path, vacancies):
+    """Тест: повторная сборка трогает только изменившиеся страницы"""
+    build_site(str(tmp_path), engine=engine)
+    untouched = tmp_path / "jobs" / "vacancies" / str(vacancies[1]) / "index.html"
+    mtime = untouched.stat().st_mtime_ns
+    assert build_site(str(tmp_path), engine=engine)["rendered"] == 0
+
+    db = SessionLocal()
+    db.get(Vacancy, vacancies[0]).description = "Новое описание"
+    db.get(Vacancy, vacancies[2]).is_active = False
+    db.commit()
+    db.close()
+
+    # Карточка 0 и список (описание есть в анонсе); лендинг меняется из-за снятой вакансии
+    stats = build_site(str(tmp_path), engine=engine)
+    assert stats == {"rendered": 3, "unchanged": 1, "removed": 1}
+    assert untouched.stat().st_mtime_ns == mtime
+    assert not (tmp_path / "jobs" / "vacancies" / str(vacancies[2])).exists()
+    assert build_site(str(tmp_path), engine=engine, force=True)["rendered"] == 4
+
+def test_static_pages_do_not_shadow_app_routes(vacancies, monkeypatch):
+    """Тест: ни один URL собранной страницы не совпадает с маршрутом приложения"""
+    from starlette.routing import Match
+    from app.main import app
+
+    monkeypatch.setattr(static_site, "VACANCY_PAGE_SIZE", 1)  # Несколько страниц списка
+    db = SessionLocal()
+    paths = static_site.collect_pages(db)
+    db.close()
+    assert len(paths) == 1 + 3 + 3
+    for path in paths:
+        url = "/" + path.removesuffix("index.html")
+        for candidate in (url, url.rstrip("/")):  # nginx отдаёт страницу и без завершающего /
+            scope = {"type": "http", "method": "GET", "path": candidate, "root_path": ""}
+            matched = [route.path for route in app.routes if route.matches(scope)[0] != Match.NONE]
+            assert matched == [], f"{candidate} shadows {matched}"
+
+def test_rebuild_if_changed_follows_table_version(tmp_path, vacancies):
+    """Тест: пересборка идёт только после записи, в том числе через Core в обход ORM"""
+    from sqlalchemy import insert
+    from app.crud import bump_table_version
+
+    assert static_site.rebuild_if_changed(str(tmp_path), engine=engine)["rendered"] == 5
+    assert static_site.rebuild_if_changed(str(tmp_path), engine=engine) is None
+
+    with engine.begin() as conn:
+        conn.execute(insert(Vacancy.__table__).values(title="Imported", description="Описание"))
+        bump_table_version(conn, Vacancy.__tablename__)
+    stats = static_site.rebuild_if_changed(str(tmp_path), engine=engine)
+    assert stats["rendered"] >= 1
+    assert "Imported" in (tmp_path / "jobs" / "vacancies" / "index.html").read_text()
+    assert static_site.rebuild_if_changed(str(tmp_path), engine=engine) is None
+
+def test_collectstatic_fingerprints_and_compresses(tmp_path):
+    """Тест: collectstatic пишет файлы с хешем, .gz и манифест"""
+    from app.assets import collect_static, load_manifest
+
+    source, output = tmp_path / "src", tmp_path / "out"
+    (source / "css").mkdir(parents=True)
+    (source / "css" / "site.css").write_text("body { color: #111; }\n" * 50)
+    (source / "tiny.txt").write_text("x")
+
+    stats = collect_static(str(source), str(output))
+    assert stats["copied"] == 2 and stats["compressed"] >= 1
+    manifest = load_manifest(str(output))
+    hashed = manifest["css/site.css"]
+    assert hashed.startswith("css/site.") and hashed.endswith(".css") and hashed != "css/site.css"
+    assert (output / hashed).read_bytes() == (source / "css" / "site.css").read_bytes()
+    assert (output / (hashed + ".gz")).exists()
+    assert not (output / (manifest["tiny.txt"] + ".gz")).exists()  # Меньше порога сжатия
+    assert collect_static(str(source), str(output))["unchanged"] == 2
+
+def test_precompressed_static_files(tmp_path):
+    """Тест: отдаётся сжатый вариант по Accept-Encoding, файлы с хешем - immutable"""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.assets import PrecompressedStaticFiles, collect_static, load_manifest
+
+    source, output = tmp_path / "src", tmp_path / "out"
+    source.mkdir()
+    content = "console.log('ARQ');\n" * 100
+    (source / "app.js").write_text(content)
+    collect_static(str(source), str(output))
+    hashed = load_manifest(str(output))["app.js"]
+
+    app = FastAPI()
+    app.mount("/static", PrecompressedStaticFiles(directory=str(output)), name="static")
+    with TestClient(app) as client:
+        response = client.get(f"/static/{hashed}", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["content-type"].startswith("text/javascript")
+        assert int(response.headers["content-length"]) == (output / (hashed + ".gz")).stat().st_size
+        assert response.text == content  # httpx распаковал
+        assert "immutable" in response.headers["cache-control"]
+        assert response.headers["vary"] == "Accept-Encoding"
+
+        plain = client.get(f"/static/{hashed}", headers={"Accept-Encoding": "identity, gzip;q=0"})
+        assert "content-encoding" not in plain.headers and plain.text == content
+        assert client.get("/static/manifest.json").headers["cache-control"] == "no-cache"
@@ -0,0 +1,76 @@
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app import tracing
+from app.tracing import TraceWriter, TracingMiddleware, span
+
+def server_timing(response) -> dict:
+    """Server-Timing -> {имя: миллисекунды}"""
+    timings = {}
+    for part in response.headers["Server-Timing"].split(", "):
+        name, *params = part.split(";")
+        timings[name] = next(float(p[4:]) for p in params if p.startswith("dur="))
+    return timings
+
+def test_server_timing_reports_phases(monkeypatch):
+    """Тест: ответ несёт Server-Timing с временем БД, сериализации, проверки токена и общим"""
+    from app.cache import vacancy_cache
+    from app.database import Base, engine
+    from app.main import app
+
+    Base.metadata.create_all(bind=engine)
+    vacancy_cache.clear()
+    client = TestClient(app)
+    # По умолчанию заголовок не отдаётся: он раскрывает устройство сервера
+    assert "Server-Timing" not in client.get("/health").headers
+
+    monkeypatch.setattr(tracing, "SERVER_TIMING", True)
+    response = client.get("/vacancies", params={"limit": 7})
+    timings = server_timing(response)
+    assert {"db", "serialize", "app"} <= set(timings)
+    assert 'desc="' in response.headers["Server-Timing"]  # Число SQL-запросов
+    assert timings["app"] >= timings["db"]
+
+    response = client.get("/auth/me", headers={"Authorization": "Bearer bad"})
+    assert "auth.token" in server_timing(response)
+
+def test_sampled_traces_exported_as_chrome_trace(tmp_path, monkeypatch):
+    """Тест: выбранный запрос записывается в файл событиями Chrome trace с вложенными фазами"""
+    writer = TraceWriter(str(tmp_path / "traces.json"))
+    monkeypatch.setattr(tracing, "_writer", writer)
+
+    inner = FastAPI()
+
+    @inner.get("/work")
+    async def work():
+        with span("render", "page.html"):
+            pass
+        return {"ok": True}
+
+    client = TestClient(TracingMiddleware(inner, sample_rate=1.0, server_timing=False))
+    response = client.get("/work")
+    assert "Server-Timing" not in response.headers
+    writer.flush()
+
+    with open(tmp_path / "traces.json") as f:
+        text = f.read()
+    assert text.startswith("[\n")
+    events = json.loads(text.rstrip().rstrip(",") + "]")
+    root, child = events
+    assert root["name"] == "GET /work" and root["ph"] == child["ph"] == "X"
+    assert root["args"]["status"] == 200 and root["args"]["route"] == "/work"
+    assert child["name"] == "render" and child["args"] == {"detail": "page.html"}
+    assert root["ts"] <= child["ts"] and child["dur"] <= root["dur"]
+    assert root["tid"] == child["tid"]
+
+def test_span_outside_trace_is_noop():
+    """Тест: span вне трассировки ничего не записывает и не мешает коду"""
+    assert tracing.current_trace() is None
+    with span("anything"):
+        value = 1
+    assert value == 1
@@ -0,0 +1,437 @@
+import pytest
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+
+from app.database import Base, engine, SessionLocal
+from app.models import Vacancy, VacancyTombstone
+from app.main import app
+
+@pytest.fixture(scope="function")
+def client():
+    """
+    Фикстура: чистая таблица вакансий в тестовой БД приложения
+    и клиент FastAPI поверх неё.
+    """
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.query(Vacancy).delete()
+    db.query(VacancyTombstone).delete()
+    db.commit()
+    db.close()
+    with TestClient(app) as test_client:
+        yield test_client
+
+def seed_vacancies(count, is_active=True, created_at=None):
+    """Добавляет count вакансий; без created_at - серверный CURRENT_TIMESTAMP"""
+    db = SessionLocal()
+    for i in range(count):
+        db.add(Vacancy(
+            title=f"Vacancy {i}",
+            description="Описание",
+            is_active=is_active,
+            created_at=created_at,
+        ))
+    db.commit()
+    db.close()
+
+def fetch_all(client, page_size):
+    """Проходит все страницы списка, возвращает id в порядке выдачи"""
+    ids, cursor = [], None
+    while True:
+        query = {"limit": page_size}
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get("/vacancies", params=query)
+        assert response.status_code == 200
+        page = response.json()
+        ids.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+def test_list_only_active(client):
+    """Тест: публичный список отдаёт только активные вакансии"""
+    seed_vacancies(3, is_active=True)
+    seed_vacancies(2, is_active=False)
+
+    items = client.get("/vacancies").json()["items"]
+    assert len(items) == 3
+    assert all(item["is_active"] for item in items)
+
+    # Архив наружу не отдаётся: параметр is_active игнорируется
+    items = client.get("/vacancies", params={"is_active": False}).json()["items"]
+    assert len(items) == 3 and all(item["is_active"] for item in items)
+
+def test_keyset_pagination_no_gaps_or_duplicates(client):
+    """Тест: курсоры проходят все строки ровно один раз, от новых к старым"""
+    # Строки с одинаковой секундой (CURRENT_TIMESTAMP) и с явными датами
+    seed_vacancies(5)
+    seed_vacancies(3, created_at=datetime.now() - timedelta(days=1))
+    seed_vacancies(2, created_at=datetime.now() - timedelta(days=2))
+
+    ids = fetch_all(client, page_size=3)
+    assert len(ids) == 10
+    assert len(set(ids)) == 10
+
+    # Внутри одной даты порядок - по убыванию id
+    db = SessionLocal()
+    created = {v.id: v.created_at.replace(tzinfo=None) for v in db.query(Vacancy)}
+    db.close()
+    keys = [(created[i], i) for i in ids]
+    assert keys == sorted(keys, reverse=True)
+
+def test_list_reads_excerpt_not_full_text(client):
+    """Тест: список отдаёт анонс и не читает description из БД"""
+    from sqlalchemy import event
+    from app import database
+
+    db = SessionLocal()
+    db.add(Vacancy(title="Long", description="Очень длинное описание. " * 2000))
+    db.commit()
+    db.close()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    engine = database.async_read_engine.sync_engine
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        item = client.get("/vacancies").json()["items"][0]
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert "description" not in item and item["excerpt"].startswith("Очень длинное описание.")
+    assert len(item["excerpt"]) < 300
+    assert statements and not any("description" in s for s in statements)
+
+def test_invalid_cursor(client):
+    """Тест: повреждённый курсор - 400, а не 500"""
+    response = client.get("/vacancies", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+def test_search_ranked_and_cyrillic(client):
+    """Тест: поиск находит кириллицу без учёта регистра, заголовок важнее"""
+    db = SessionLocal()
+    db.add_all([
+        Vacancy(title="Бухгалтер", description="Работа с Python-скриптами отчётности"),
+        Vacancy(title="Python разработчик", description="Бэкенд на FastAPI"),
+        Vacancy(title="Архивный Python", description="Закрыта", is_active=False),
+    ])
+    db.commit()
+    db.close()
+
+    items = client.get("/vacancies/search", params={"q": "python"}).json()["items"]
+    assert [item["title"] for item in items] == ["Python разработчик", "Бухгалтер"]
+
+    # Регистр и префикс для кириллицы
+    items = client.get("/vacancies/search", params={"q": "БЭКЕНД"}).json()["items"]
+    assert [item["title"] for item in items] == ["Python разработчик"]
+    items = client.get("/vacancies/search", params={"q": "бухгал"}).json()["items"]
+    assert [item["title"] for item in items] == ["Бухгалтер"]
+
+    # Операторы FTS5 в запросе не ломают поиск
+    response = client.get("/vacancies/search", params={"q": 'python" OR -"'})
+    assert response.status_code == 200
+
+def test_search_index_follows_updates_and_deletes(client):
+    """Тест: триггеры синхронизируют индекс при изменении и удалении"""
+    db = SessionLocal()
+    vacancy = Vacancy(title="Тестировщик", description="Ручное тестирование")
+    db.add(vacancy)
+    db.commit()
+
+    vacancy.description = "Автоматизация на pytest"
+    db.commit()
+    assert client.get("/vacancies/search", params={"q": "ручное"}).json()["items"] == []
+    assert len(client.get("/vacancies/search", params={"q": "pytest"}).json()["items"]) == 1
+
+    db.delete(vacancy)
+    db.commit()
+    db.close()
+    assert client.get("/vacancies/search", params={"q": "pytest"}).json()["items"] == []
+
+def test_rebuild_search_index(client):
+    """Тест: reindex восстанавливает индекс после его очистки"""
+    from app.crud import rebuild_search_index
+
+    seed_vacancies(3)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO vacancies_fts(vacancies_fts) VALUES ('delete-all')")
+    assert client.get("/vacancies/search", params={"q": "описание"}).json()["items"] == []
+
+    assert rebuild_search_index(engine) == 3
+    assert len(client.get("/vacancies/search", params={"q": "описание"}).json()["items"]) == 3
+
+def test_cache_hit_skips_database(client, monkeypatch):
+    """Тест: повторный запрос списка отдаётся из кеша без обращения к БД"""
+    import app.database as database
+
+    seed_vacancies(2)
+    first = client.get("/vacancies")
+    assert first.status_code == 200
+
+    def no_db():
+        raise AssertionError("database touched on cache hit")
+    monkeypatch.setattr(database, "AsyncReadSessionLocal", no_db)
+
+    second = client.get("/vacancies")
+    assert second.content == first.content
+    assert second.headers["content-type"] == "application/json"
+
+def test_cache_invalidated_by_vacancy_writes(client):
+    """Тест: изменение, добавление и удаление вакансии сбрасывают кеш"""
+    seed_vacancies(1)
+    vacancy_id = client.get("/vacancies").json()["items"][0]["id"]
+    assert client.get(f"/vacancies/{vacancy_id}").json()["title"] == "Vacancy 0"
+
+    db = SessionLocal()
+    vacancy = db.get(Vacancy, vacancy_id)
+    vacancy.title = "Renamed"
+    db.commit()
+    assert client.get(f"/vacancies/{vacancy_id}").json()["title"] == "Renamed"
+    assert client.get("/vacancies").json()["items"][0]["title"] == "Renamed"
+
+    db.add(Vacancy(title="Second", description="Описание"))
+    db.commit()
+    assert len(client.get("/vacancies").json()["items"]) == 2
+
+    db.delete(db.get(Vacancy, vacancy_id))
+    db.commit()
+    db.close()
+    assert client.get(f"/vacancies/{vacancy_id}").status_code == 404
+    assert len(client.get("/vacancies").json()["items"]) == 1
+
+def test_conditional_get_not_modified(client, monkeypatch):
+    """Тест: актуальные ETag / Last-Modified дают 304 без запроса списка"""
+    from app import crud
+
+    seed_vacancies(2)
+    first = client.get("/vacancies")
+    etag, last_modified = first.headers["ETag"], first.headers["Last-Modified"]
+    assert etag.startswith('"') and client.get("/vacancies", params={"limit": 5}).headers["ETag"] != etag
+
+    async def no_listing(*args, **kwargs):
+        raise AssertionError("listing query on conditional hit")
+    monkeypatch.setattr(crud, "list_vacancies", no_listing)
+
+    response = client.get("/vacancies", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag and response.content == b""
+    assert client.get("/vacancies", headers={"If-Modified-Since": last_modified}).status_code == 304
+
+def test_compressed_list_revalidates(client):
+    """Тест: сжатый список получает слабый ETag, и он подходит для 304"""
+    seed_vacancies(20)
+    response = client.get("/vacancies", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert client.get("/vacancies", headers={"If-None-Match": etag}).status_code == 304
+
+def test_etag_changes_on_vacancy_writes(client):
+    """Тест: версия таблицы растёт при записи через ORM и массовых операциях"""
+    seed_vacancies(1)
+    vacancy_id = client.get("/vacancies").json()["items"][0]["id"]
+    etags = [client.get(f"/vacancies/{vacancy_id}").headers["ETag"]]
+
+    db = SessionLocal()
+    db.get(Vacancy, vacancy_id).title = "Renamed"
+    db.commit()
+    etags.append(client.get(f"/vacancies/{vacancy_id}").headers["ETag"])
+
+    db.query(Vacancy).filter(Vacancy.id == vacancy_id).update({"title": "Bulk"})
+    db.commit()
+    db.close()
+    response = client.get(f"/vacancies/{vacancy_id}", headers={"If-None-Match": etags[-1]})
+    assert response.status_code == 200 and response.json()["title"] == "Bulk"
+    etags.append(response.headers["ETag"])
+    assert len(set(etags)) == 3
+
+def test_writes_from_other_processes_change_etag(client, monkeypatch):
+    """Тест: запись в обход кеша этого процесса (импорт, другой воркер) видна после VACANCY_VERSION_TTL"""
+    import time
+    from sqlalchemy import insert
+    from app.crud import bump_table_version
+    from app.routers import public
+
+    monkeypatch.setattr(public, "VACANCY_VERSION_TTL", 0.05)
+    seed_vacancies(3)
+    first = client.get("/vacancies")
+    assert len(first.json()["items"]) == 3
+
+    # Как другой процесс: Core-запись с версией таблицы, без событий ORM этого процесса
+    from app.cache import vacancy_cache
+    generation = vacancy_cache.generation
+    with engine.begin() as conn:
+        conn.execute(insert(Vacancy.__table__).values(title="Imported", description="Описание"))
+        bump_table_version(conn, Vacancy.__tablename__)
+    assert vacancy_cache.generation == generation  # Кеш этого процесса ни о чём не знает
+
+    time.sleep(0.1)
+    response = client.get("/vacancies", headers={"If-None-Match": first.headers["ETag"]})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != first.headers["ETag"]
+    assert len(response.json()["items"]) == 4
+
+def test_sql_metrics_exported(client):
+    """Тест: SQL-статистика запросов попадает в /metrics"""
+    seed_vacancies(1)
+    client.get("/vacancies", params={"limit": 7})
+
+    body = client.get("/metrics").text
+    assert 'sql_queries_per_request_count{route="/vacancies"}' in body
+    assert 'sql_seconds_per_request_bucket{route="/vacancies",le="+Inf"}' in body
+
+def fetch_changes(client, since=None, limit=2):
+    """Проходит ленту изменений до конца, возвращает (изменения, последний курсор)"""
+    changes = []
+    while True:
+        params = {"limit": limit}
+        if since:
+            params["since"] = since
+        response = client.get("/vacancies/changes", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        changes.extend(page["items"])
+        since = page["next_cursor"]
+        if not page["has_more"]:
+            return changes, since
+
+def test_change_feed(client, monkeypatch):
+    """Тест: лента отдаёт добавления, правки, снятие с публикации и удаления"""
+    from app import crud
+    monkeypatch.setattr(crud, "CHANGE_FEED_LAG", -5)  # Без задержки, включая текущую секунду
+
+    seed_vacancies(4)
+    # Метки с точностью до секунды: начальный снимок уводим в прошлое,
+    # чтобы правки ниже гарантированно шли после курсора
+    db = SessionLocal()
+    db.query(Vacancy).update({"updated_at": datetime(2020, 1, 1)})
+    db.commit()
+    db.close()
+    changes, cursor = fetch_changes(client)
+    assert [c["op"] for c in changes] == ["upsert"] * 4
+    ids = [c["id"] for c in changes]
+    assert ids == sorted(ids) and changes[0]["vacancy"]["title"] == "Vacancy 0"
+    assert fetch_changes(client, cursor) == ([], cursor)
+
+    db = SessionLocal()
+    db.get(Vacancy, ids[0]).title = "Renamed"
+    db.get(Vacancy, ids[1]).is_active = False
+    db.delete(db.get(Vacancy, ids[2]))
+    db.commit()
+    db.query(Vacancy).filter(Vacancy.id == ids[3]).delete()
+    db.commit()
+    db.close()
+
+    changes, cursor = fetch_changes(client, cursor)
+    by_id = {c["id"]: c for c in changes}
+    assert len(changes) == 4
+    assert by_id[ids[0]]["op"] == "upsert" and by_id[ids[0]]["vacancy"]["title"] == "Renamed"
+    assert by_id[ids[1]]["op"] == "deactivate" and by_id[ids[1]]["vacancy"] is None
+    assert by_id[ids[2]]["op"] == by_id[ids[3]]["op"] == "delete"
+    assert fetch_changes(client, cursor)[0] == []
+
+def test_change_feed_lag_and_invalid_cursor(client):
+    """Тест: свежие изменения придерживаются на CHANGE_FEED_LAG, битый курсор - 400"""
+    seed_vacancies(1)
+    assert client.get("/vacancies/changes").json()["items"] == []
+    assert client.get("/vacancies/changes", params={"since": "garbage"}).status_code == 400
+
+def test_startup_warmup_and_readiness(client):
+    """Тест: lifespan прогревает кеш вакансий и хеширование, затем /health/ready = 200"""
+    from app import warmup
+    from app.cache import list_key, vacancy_cache
+    from app.routers import admin
+
+    body = client.get("/health/ready").json()
+    assert body["status"] == "ready" and body["warmup"]["errors"] == {}
+    assert set(body["warmup"]["steps"]) == {name for name, _ in warmup.WARMUP_STEPS}
+    assert admin._dummy_hash is not None
+    assert any(key[0] == "list" and key[2:] == (None, 20) for key in vacancy_cache._entries)
+
+    warmup.warmup_state.done = False
+    try:
+        response = client.get("/health/ready")
+        assert response.status_code == 503 and response.json()["status"] == "warming_up"
+    finally:
+        warmup.warmup_state.done = True
+
+def test_warmup_retries_failed_steps(monkeypatch):
+    """Тест: упавший шаг прогрева повторяется с паузой; ошибка снимается при успехе"""
+    import asyncio
+    from app import warmup
+
+    attempts = {"flaky": 0, "broken": 0}
+
+    async def flaky():
+        attempts["flaky"] += 1
+        if attempts["flaky"] < 3:
+            raise ConnectionError("database is starting")
+
+    async def broken():
+        attempts["broken"] += 1
+        raise RuntimeError("no templates")
+
+    # Временный сбой: готовность восстанавливается без перезапуска
+    monkeypatch.setattr(warmup, "WARMUP_STEPS", (("flaky", flaky),))
+    state = asyncio.run(warmup.warm_up(warmup.WarmupState()))
+    assert not state.ready and "flaky" in state.errors
+    asyncio.run(warmup.retry_failed(state, retries=5, delay=0.001))
+    assert state.ready and state.errors == {} and state.retries == 2
+
+    # Постоянный сбой: попытки заканчиваются, сервер остаётся не готов
+    monkeypatch.setattr(warmup, "WARMUP_STEPS", (("flaky", flaky), ("broken", broken)))
+    state = asyncio.run(warmup.warm_up(warmup.WarmupState()))
+    asyncio.run(warmup.retry_failed(state, retries=3, delay=0.001))
+    assert not state.ready and list(state.errors) == ["broken"]
+    assert state.retries == 3 and attempts["broken"] == 4
+
+def test_liveness_and_readiness_probes(client, monkeypatch):
+    """Тест: /health/ready проверяет БД и пулы, результат кешируется, отказ БД - 503"""
+    from app import health
+
+    health.readiness_probe.clear()
+    assert client.get("/health/live").json()["status"] == "alive"
+
+    body = client.get("/health/ready").json()
+    assert body["status"] == "ready" and body["failures"] == []
+    assert body["database"]["engine"]["ok"] and body["database"]["engine"]["latency_ms"] >= 0
+    assert body["pools"]["engine"]["size"] == 1 and "checked_out" in body["pools"]["engine"]
+    assert body["event_loop"]["running"]
+
+    calls = []
+
+    async def failing_ping(engine):
+        calls.append(engine)
+        return {"ok": False, "latency_ms": 1000.0, "error": "timeout"}
+
+    monkeypatch.setattr(health, "_ping", failing_ping)
+    # В пределах HEALTH_CACHE_SECONDS отдаётся сохранённый результат
+    assert client.get("/health/ready").status_code == 200 and calls == []
+
+    health.readiness_probe.clear()
+    try:
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "not_ready"
+        assert "database:engine" in response.json()["failures"]
+    finally:
+        health.readiness_probe.clear()
+
+def test_readiness_probe_exception_is_not_ready(client, monkeypatch):
+    """Тест: исключение внутри проверки готовности - 503 с текстом ошибки, а не 500"""
+    from app import health
+
+    async def broken_probe():
+        raise RuntimeError("engine disposed")
+
+    monkeypatch.setattr(health.readiness_probe, "probe", broken_probe)
+    health.readiness_probe.clear()
+    try:
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        body = response.json()
+        assert body["status"] == "not_ready" and body["failures"] == ["probe"]
+        assert body["error"] == "RuntimeError: engine disposed"
+        assert health.readiness_probe._running is None
+    finally:
+        health.readiness_probe.clear()